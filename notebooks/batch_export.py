@@ -0,0 +1,244 @@
+"""Exports report figures in parallel without a display.
+
+The manifest is a JSON list of figures to render, each given as
+
+    {"function": "joint_distribution", "arguments": {...},
+     "output": "figures/joint.png"}
+
+where function is one of the names in EXPORTERS, arguments are forwarded to
+it, and the output format, PNG or SVG, follows the file extension. Array
+arguments can be given as JSON lists or as {"npy": "path/to/array.npy"}.
+Render the manifest with
+
+    python batch_export.py manifest.json --summary summary.json
+
+Figures are rendered across a pool of worker processes, which use the Agg
+backend. With a single worker they are rendered in the calling process,
+whose backend is left as it is. Each worker keeps one figure per plot
+function instead of creating a new one for every plot, drawn on an Agg
+canvas without pyplot. The ADC plots also keep their axes and
+only clear them. The joint distribution figure is cleared and its main and
+marginal axes are rebuilt, since plot_joint_distribution lays them out
+itself. The demos build their own figures and sliders, so their static
+views get a fresh figure each time.
+The summary records the render time of every figure and the overall
+throughput.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
+# Figures reused by the plot functions of this worker process, by name.
+_worker_figures: dict[str, "Figure"] = {}
+
+
+def _initialize_worker():
+    # Only called in pool worker processes, never in the caller's process,
+    # whose backend must not change.
+    import matplotlib
+
+    matplotlib.use("Agg")
+
+
+def _create_figure(**figure_kwargs):
+    # Attach an Agg canvas directly instead of going through pyplot, so the
+    # figure renders the same whatever the current backend is.
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figure = Figure(**figure_kwargs)
+    FigureCanvasAgg(figure)
+    return figure
+
+
+def _get_worker_figure(name, **figure_kwargs):
+    if name not in _worker_figures:
+        _worker_figures[name] = _create_figure(**figure_kwargs)
+    figure = _worker_figures[name]
+    figure.clear()
+    return figure
+
+
+def _get_worker_axes(name, **figure_kwargs):
+    if name not in _worker_figures:
+        _worker_figures[name] = _create_figure(**figure_kwargs)
+        _worker_figures[name].add_subplot()
+    ax = _worker_figures[name].axes[0]
+    ax.clear()
+    return ax
+
+
+def _decode_argument(value):
+    if isinstance(value, dict) and set(value) == {"npy"}:
+        return np.load(value["npy"])
+    if isinstance(value, list):
+        return np.asarray(value)
+    return value
+
+
+def _export_joint_distribution(**arguments):
+    from joint_distribution_plotter import plot_joint_distribution
+
+    figure = _get_worker_figure("joint_distribution", layout="constrained")
+    plot_joint_distribution(fig=figure, **arguments)
+    return figure
+
+
+def _export_adc_signals(
+    time_seconds, input_signal, bit_depth=3, text_renderer="usetex"
+):
+    from circuit_models import ADCModel
+
+    ax = _get_worker_axes("adc_signals", figsize=(10, 6))
+    adc_model = ADCModel(bit_depth=bit_depth)
+    adc_model.quantize_signal(time_seconds, input_signal)
+    adc_model.plot_signals(text_renderer, ax=ax)
+    return ax.figure
+
+
+def _export_amplifier_demo(time_seconds, input_signal, **arguments):
+    from circuit_demos import AmplifierDemo
+
+    demo = AmplifierDemo(**arguments)
+    demo.instantiate_plot(time_seconds, input_signal)
+    return demo.fig
+
+
+def _export_l2_norm_demo(**arguments):
+    from linear_algebra_demos import L2NormDemo
+
+    demo = L2NormDemo(**arguments)
+    demo.instantiate_plot()
+    return demo.fig
+
+
+def _export_lp_norm_demo(**arguments):
+    from linear_algebra_demos import LPNormDemo
+
+    demo = LPNormDemo(**arguments)
+    demo.instantiate_plot()
+    return demo.fig
+
+
+EXPORTERS = {
+    "joint_distribution": _export_joint_distribution,
+    "adc_signals": _export_adc_signals,
+    "amplifier_demo": _export_amplifier_demo,
+    "l2_norm_demo": _export_l2_norm_demo,
+    "lp_norm_demo": _export_lp_norm_demo,
+}
+
+
+def export_figure(entry):
+    """Render one manifest entry and save it to its output path.
+
+    Args:
+        entry: dict with the function name, its arguments and the output
+            path of the figure.
+
+    Returns:
+        A dict with the function, output path, render time in seconds, and
+        the error message if rendering failed.
+    """
+    import matplotlib.pyplot as plt
+
+    result = {"function": entry["function"], "output": entry["output"]}
+    start = time.perf_counter()
+    try:
+        export = EXPORTERS[entry["function"]]
+        arguments = {
+            name: _decode_argument(value)
+            for name, value in entry.get("arguments", {}).items()
+        }
+        figure = export(**arguments)
+        output_directory = os.path.dirname(entry["output"])
+        if output_directory:
+            os.makedirs(output_directory, exist_ok=True)
+        figure.savefig(entry["output"])
+        if figure not in _worker_figures.values():
+            plt.close(figure)
+    except Exception as error:
+        result["error"] = f"{type(error).__name__}: {error}"
+    result["render_time_s"] = time.perf_counter() - start
+    return result
+
+
+def export_figures(manifest, n_workers=None, chunk_size=8):
+    """Render every figure of a manifest across a pool of processes.
+
+    Args:
+        manifest: list of manifest entries, see export_figure.
+        n_workers: the number of worker processes. Defaults to the number
+            of CPUs. With one worker the figures are rendered in process.
+        chunk_size: the number of entries sent to a worker at a time.
+
+    Returns:
+        A dict holding the overall throughput and a list of per-figure
+        results in manifest order.
+    """
+    if n_workers is None:
+        n_workers = os.cpu_count()
+    start = time.perf_counter()
+    if n_workers == 1:
+        results = [export_figure(entry) for entry in manifest]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=n_workers, initializer=_initialize_worker
+        ) as executor:
+            results = list(
+                executor.map(export_figure, manifest, chunksize=chunk_size)
+            )
+    wall_time = time.perf_counter() - start
+    render_times = [result["render_time_s"] for result in results]
+    return {
+        "n_figures": len(results),
+        "n_failed": sum("error" in result for result in results),
+        "n_workers": n_workers,
+        "wall_time_s": wall_time,
+        "figures_per_second": len(results) / wall_time if wall_time else 0,
+        "total_render_time_s": sum(render_times),
+        "results": results,
+    }
+
+
+def _parse_arguments(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("manifest")
+    parser.add_argument("--summary", default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=8)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    arguments = _parse_arguments(argv)
+    with open(arguments.manifest) as manifest_file:
+        manifest = json.load(manifest_file)
+    summary = export_figures(manifest, arguments.workers, arguments.chunk_size)
+    for result in summary["results"]:
+        if "error" in result:
+            print(f"{result['output']}: {result['error']}", file=sys.stderr)
+    print(
+        f"{summary['n_figures']} figures in {summary['wall_time_s']:.2f} s "
+        f"({summary['figures_per_second']:.1f} figures/s, "
+        f"{summary['n_workers']} workers, {summary['n_failed']} failed)",
+        file=sys.stderr,
+    )
+    if arguments.summary is not None:
+        with open(arguments.summary, "w") as summary_file:
+            json.dump(summary, summary_file, indent=2)
+    return 1 if summary["n_failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
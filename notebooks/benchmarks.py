@@ -0,0 +1,344 @@
+"""Benchmarks the numeric hot paths of the notebook modules.
+
+Run the suite and write a machine readable results file with
+
+    python benchmarks.py run --output results.json
+
+and flag regressions between two results files with
+
+    python benchmarks.py compare baseline.json results.json
+
+Each case records its best wall time over several repeats, the peak memory
+traced by tracemalloc during one run, and the number of memory blocks that
+run left allocated. NumPy reports its array buffers to tracemalloc, so
+these include array data.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+from circuit_models import ADCModel  # noqa: E402
+from function_demos import plot_dx_list  # noqa: E402
+from joint_distribution_plotter import confidence_ellipse  # noqa: E402
+from linear_algebra_models import compute_lp_norm  # noqa: E402
+from signal_tools import (  # noqa: E402
+    add_white_gaussian_noise,
+    generate_tone_signal,
+)
+from spring_demos import SpringForceModel  # noqa: E402
+
+DEFAULT_SIZES = [10**3, 10**4, 10**5, 10**6]
+GRID_SIZES = [25, 100, 500, 1000]
+POLYNOMIAL_DEGREES = [5, 10, 20]
+DX_INTERVAL_COUNTS = [10, 100]
+SAMPLE_RATE_HZ = 8000
+
+
+def _setup_adc_quantize_signal(n_samples):
+    time_seconds = np.arange(n_samples) / SAMPLE_RATE_HZ
+    input_signal = np.sin(2 * np.pi * 50 * time_seconds)
+    adc_model = ADCModel(bit_depth=8)
+    return lambda: adc_model.quantize_signal(time_seconds, input_signal)
+
+
+def _setup_compute_lp_norm(grid_size, p_parameter):
+    x_component, y_component = np.meshgrid(
+        np.linspace(-10, 10, grid_size), np.linspace(-10, 10, grid_size)
+    )
+    return lambda: compute_lp_norm(x_component, y_component, p_parameter)
+
+
+def _build_spring_model(degree):
+    return SpringForceModel(2.0, 0.5, 1.0, 3.0, degree)
+
+
+def _setup_spring_force_piecewise(n_samples):
+    displacement_x = np.linspace(-4, 4, n_samples)
+    spring_model = _build_spring_model(10)
+    return lambda: spring_model.compute_spring_force_piecewise(displacement_x)
+
+
+def _setup_fit_polynomial_model(n_samples, degree):
+    displacement_x = np.linspace(-4, 4, n_samples)
+    spring_model = _build_spring_model(degree)
+    return lambda: spring_model.fit_polynomial_model(displacement_x)
+
+
+def _setup_add_white_gaussian_noise(n_samples):
+    signal_array = np.sin(np.linspace(0, 100, n_samples))
+    rng = np.random.default_rng(0)
+    return lambda: add_white_gaussian_noise(signal_array, 10, rng)
+
+
+def _setup_generate_tone_signal(n_samples):
+    time_seconds = np.arange(n_samples) / SAMPLE_RATE_HZ
+    duration_seconds = n_samples / SAMPLE_RATE_HZ
+    return lambda: generate_tone_signal(
+        time_seconds, 0.25 * duration_seconds, 0.5 * duration_seconds, 440
+    )
+
+
+def _setup_confidence_ellipse(n_samples):
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=n_samples)
+    y = 0.5 * x + rng.normal(size=n_samples)
+    fig, ax = plt.subplots()
+
+    def run():
+        confidence_ellipse(x, y, ax, n_std=2).remove()
+
+    return run
+
+
+def _setup_plot_dx_list(n_samples, n_intervals):
+    x_array = np.linspace(-8, 8, n_samples)
+    x0_start_values = np.linspace(-7, 6, n_intervals)
+    dx_change_values = np.full(n_intervals, 0.5)
+    color_strings = ["b"] * n_intervals
+    fig, ax = plt.subplots()
+
+    def run():
+        plot_dx_list(
+            ax,
+            x_array,
+            np.tanh,
+            x0_start_values,
+            dx_change_values,
+            color_strings,
+        )
+        for collection in list(ax.collections):
+            collection.remove()
+
+    return run
+
+
+def build_cases(sizes):
+    """Build the benchmark cases for the given signal sizes.
+
+    Args:
+        sizes: list of sample counts used for one dimensional inputs.
+
+    Returns:
+        A list of (name, params, setup) tuples, where setup(**params)
+        prepares inputs and returns the function to be timed.
+    """
+    cases = []
+    for n_samples in sizes:
+        params = {"n_samples": n_samples}
+        cases += [
+            ("adc_quantize_signal", params, _setup_adc_quantize_signal),
+            (
+                "spring_force_piecewise",
+                params,
+                _setup_spring_force_piecewise,
+            ),
+            (
+                "add_white_gaussian_noise",
+                params,
+                _setup_add_white_gaussian_noise,
+            ),
+            ("generate_tone_signal", params, _setup_generate_tone_signal),
+            ("confidence_ellipse", params, _setup_confidence_ellipse),
+        ]
+        for degree in POLYNOMIAL_DEGREES:
+            cases.append(
+                (
+                    "fit_polynomial_model",
+                    {"n_samples": n_samples, "degree": degree},
+                    _setup_fit_polynomial_model,
+                )
+            )
+        for n_intervals in DX_INTERVAL_COUNTS:
+            cases.append(
+                (
+                    "plot_dx_list",
+                    {"n_samples": n_samples, "n_intervals": n_intervals},
+                    _setup_plot_dx_list,
+                )
+            )
+    for grid_size in GRID_SIZES:
+        for p_parameter in [0, 0.5, 2]:
+            cases.append(
+                (
+                    "compute_lp_norm",
+                    {"grid_size": grid_size, "p_parameter": p_parameter},
+                    _setup_compute_lp_norm,
+                )
+            )
+    return cases
+
+
+def measure(run, repeats):
+    """Measure the wall time and memory use of a function.
+
+    Args:
+        run: the function to measure, called with no arguments.
+        repeats: the number of timed calls.
+
+    Returns:
+        A dict of measurements.
+    """
+    wall_times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        wall_times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    blocks_before = len(tracemalloc.take_snapshot().traces)
+    tracemalloc.reset_peak()
+    baseline_bytes, _ = tracemalloc.get_traced_memory()
+    run()
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    blocks_after = len(tracemalloc.take_snapshot().traces)
+    tracemalloc.stop()
+
+    return {
+        "wall_time_s": min(wall_times),
+        "wall_times_s": wall_times,
+        "peak_memory_bytes": peak_bytes - baseline_bytes,
+        "retained_allocations": blocks_after - blocks_before,
+    }
+
+
+def run_benchmarks(sizes, repeats, name_filter=None):
+    """Run every benchmark case and collect the results.
+
+    Args:
+        sizes: list of sample counts used for one dimensional inputs.
+        repeats: the number of timed calls per case.
+        name_filter: optional substring a case name must contain to run.
+
+    Returns:
+        A dict holding metadata and a list of per-case results.
+    """
+    results = []
+    for name, params, setup in build_cases(sizes):
+        if name_filter is not None and name_filter not in name:
+            continue
+        run = setup(**params)
+        measurements = measure(run, repeats)
+        results.append({"name": name, "params": params, **measurements})
+        print(
+            f"{name} {params}: {measurements['wall_time_s'] * 1e3:.3f} ms, "
+            f"peak {measurements['peak_memory_bytes'] / 2**20:.1f} MiB",
+            file=sys.stderr,
+        )
+        plt.close("all")
+    return {
+        "metadata": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "matplotlib": matplotlib.__version__,
+            "platform": platform.platform(),
+            "repeats": repeats,
+        },
+        "results": results,
+    }
+
+
+def _make_case_key(result):
+    return result["name"], json.dumps(result["params"], sort_keys=True)
+
+
+def compare_results(baseline, candidate, time_threshold, memory_threshold):
+    """Find cases that got slower or use more memory than the baseline.
+
+    Args:
+        baseline: dict loaded from a baseline results file.
+        candidate: dict loaded from a new results file.
+        time_threshold: the relative wall time increase that is flagged.
+        memory_threshold: the relative peak memory increase that is flagged.
+
+    Returns:
+        A list of (name, params, metric, baseline value, candidate value).
+    """
+    baseline_results = {
+        _make_case_key(result): result for result in baseline["results"]
+    }
+    regressions = []
+    for result in candidate["results"]:
+        baseline_result = baseline_results.get(_make_case_key(result))
+        if baseline_result is None:
+            continue
+        for metric, threshold in [
+            ("wall_time_s", time_threshold),
+            ("peak_memory_bytes", memory_threshold),
+        ]:
+            if result[metric] > baseline_result[metric] * (1 + threshold):
+                regressions.append(
+                    (
+                        result["name"],
+                        result["params"],
+                        metric,
+                        baseline_result[metric],
+                        result[metric],
+                    )
+                )
+    return regressions
+
+
+def _parse_arguments(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--output", required=True)
+    run_parser.add_argument(
+        "--sizes",
+        type=lambda text: [int(float(size)) for size in text.split(",")],
+        default=DEFAULT_SIZES,
+        help="comma separated sample counts, e.g. 1e3,1e6,1e8",
+    )
+    run_parser.add_argument("--repeats", type=int, default=5)
+    run_parser.add_argument("--filter", default=None)
+
+    compare_parser = subparsers.add_parser(
+        "compare", help="flag regressions between two results files"
+    )
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument("--time-threshold", type=float, default=0.1)
+    compare_parser.add_argument("--memory-threshold", type=float, default=0.1)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    arguments = _parse_arguments(argv)
+    if arguments.command == "run":
+        results = run_benchmarks(
+            arguments.sizes, arguments.repeats, arguments.filter
+        )
+        with open(arguments.output, "w") as results_file:
+            json.dump(results, results_file, indent=2)
+        return 0
+
+    with open(arguments.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+    with open(arguments.candidate) as candidate_file:
+        candidate = json.load(candidate_file)
+    regressions = compare_results(
+        baseline,
+        candidate,
+        arguments.time_threshold,
+        arguments.memory_threshold,
+    )
+    for name, params, metric, old_value, new_value in regressions:
+        print(f"{name} {params}: {metric} {old_value:.6g} -> {new_value:.6g}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""Provides a blitting layer for redrawing interactive demos quickly.
+
+This is adapted from MatPlotLib's blitting tutorial here:
+https://matplotlib.org/stable/users/explain/animations/blitting.html
+"""
+
+
+class BlitManager:
+    """Redraw only the moving artists of a figure over a cached background.
+
+    The static parts of the figure are drawn once and cached whenever the
+    canvas is fully redrawn. Updates restore that background and draw only
+    the animated artists, so no tick labels, titles or colorbars are
+    re-rendered. Canvases that cannot blit fall back to draw_idle.
+    """
+
+    def __init__(self, canvas, animated_artists=()):
+        self.canvas = canvas
+        self._background = None
+        self._artists = []
+        self.set_artists(animated_artists)
+        self._draw_event_id = canvas.mpl_connect("draw_event", self._on_draw)
+
+    def set_artists(self, animated_artists):
+        """Replace the set of artists redrawn on every update.
+
+        Artists are marked as animated, so full redraws leave them out of the
+        cached background.
+
+        Args:
+            animated_artists: iterable of matplotlib artists.
+
+        Returns:
+            None
+        """
+        for artist in self._artists:
+            artist.set_animated(False)
+        self._artists = list(animated_artists)
+        for artist in self._artists:
+            artist.set_animated(True)
+
+    def _on_draw(self, event):
+        if event is not None and event.canvas is not self.canvas:
+            raise RuntimeError("draw event came from a different canvas")
+        if not getattr(self.canvas, "supports_blit", False):
+            return
+        self._background = self.canvas.copy_from_bbox(self.canvas.figure.bbox)
+        self._draw_animated_artists()
+
+    def _draw_animated_artists(self):
+        figure = self.canvas.figure
+        for artist in self._artists:
+            if artist.figure is figure:
+                figure.draw_artist(artist)
+
+    def update(self):
+        """Redraw the animated artists over the cached background."""
+        if self._background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self._background)
+        self._draw_animated_artists()
+        self.canvas.blit(self.canvas.figure.bbox)
+        self.canvas.flush_events()
+
+    def disconnect(self):
+        """Stop caching the background and restore normal drawing."""
+        self.canvas.mpl_disconnect(self._draw_event_id)
+        self.set_artists(())
+        self._background = None
+
+
+def get_slider_artists(slider):
+    """Return the artists of a Slider that move when its value changes."""
+    return [slider.poly, slider.valtext, *slider.ax.lines]
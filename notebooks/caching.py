@@ -0,0 +1,43 @@
+"""Provides the least recently used cache shared by the notebook models."""
+
+from collections import OrderedDict
+from typing import Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """Keep the maxsize most recently used values by key.
+
+    Unlike functools.lru_cache, the caller computes the key, so values can be
+    cached for arguments that are not hashable themselves, such as arrays.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._values: OrderedDict[K, V] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._values
+
+    def get(self, key: K) -> V | None:
+        """Return the value for a key and mark it as recently used.
+
+        Returns:
+            The cached value, or None if the key is not cached.
+        """
+        if key not in self._values:
+            return None
+        self._values.move_to_end(key)
+        return self._values[key]
+
+    def put(self, key: K, value: V) -> None:
+        """Cache a value, evicting the least recently used beyond maxsize."""
+        self._values[key] = value
+        self._values.move_to_end(key)
+        while len(self._values) > self.maxsize:
+            self._values.popitem(last=False)
@@ -1,6 +1,12 @@
-import matplotlib.pyplot as plt
-import numpy as np
-from matplotlib.widgets import Slider
+from blit_manager import BlitManager, get_slider_artists
+from circuit_models import (  # noqa: F401
+    ADCModel,
+    AmplifierEngine,
+    HarmonicDistortionAnalyzer,
+    TanhLookupTable,
+)
+from interaction_profiler import measure_phase
+from label_rendering import apply_text_renderer
 
 
 class AmplifierDemo:
@@ -11,26 +17,63 @@ def __init__(
         amplitude_init=1,
         amplitude_min=0.1,
         amplitude_max=5,
+        use_blit=False,
+        cache_size=64,
+        tanh_max_error=None,
+        latency_recorder=None,
+        text_renderer="usetex",
     ):
         self.amplitude_init = amplitude_init
         self.amplitude_min = amplitude_min
         self.amplitude_max = amplitude_max
+        self.use_blit = use_blit
+        self.cache_size = cache_size
+        self.tanh_max_error = tanh_max_error
+        self.latency_recorder = latency_recorder
+        self.text_renderer = text_renderer
         self.y_limit = 6
 
     def instantiate_plot(self, time_seconds, input_signal):
         """Creates a plot to demonstrate amplifier distortion."""
+        import matplotlib.pyplot as plt
+
         self.time_ms = time_seconds * 1000
         self.input_signal = input_signal
+        self._amplifier_engine = AmplifierEngine(
+            input_signal,
+            cache_size=self.cache_size,
+            tanh_max_error=self.tanh_max_error,
+        )
         self._compute_amplifier_outputs()
         self._create_plot()
+        if self.latency_recorder is not None:
+            self.latency_recorder.instrument_canvas(self.fig.canvas)
         self._configure_plot_axes()
         self._plot_amplifier_outputs()
         self._build_sliders()
         self.slider.on_changed(self._update)
         self.ax.legend(["Nonlinear", "Linear"], loc="upper right")
+        self._build_blit_manager()
         plt.show()
 
+    def _build_blit_manager(self):
+        self._blit_manager = None
+        if not self.use_blit:
+            return
+        self.slider.drawon = False
+        self._blit_manager = BlitManager(
+            self.fig.canvas,
+            [
+                self.nonlinear_amplifier_line_plot,
+                self.linear_amplifier_line_plot,
+                *get_slider_artists(self.slider),
+            ],
+        )
+
     def _build_sliders(self):
+        import matplotlib.pyplot as plt
+        from matplotlib.widgets import Slider
+
         self.ax_slider = plt.axes(
             [0.1, 0.05, 0.8, 0.05], facecolor="lightgray"
         )
@@ -52,9 +95,13 @@ def _compute_amplifier_outputs(self):
         )
 
     def _configure_plot_axes(self):
-        self.ax.set_xlabel(r"$t$ (ms)", usetex=True)
-        self.ax.set_ylabel(r"$y(t)$ (V)", usetex=True)
-        self.ax.set_title(r"Amplifier Outputs", usetex=True)
+        self.ax.set_xlabel(r"$t$ (ms)")
+        self.ax.set_ylabel(r"$y(t)$ (V)")
+        self.ax.set_title(r"Amplifier Outputs")
+        apply_text_renderer(
+            [self.ax.xaxis.label, self.ax.yaxis.label, self.ax.title],
+            self.text_renderer,
+        )
         self.ax.set_ylim([-self.y_limit, self.y_limit])
         xtick_labels = self.ax.get_xticklabels()
         ytick_labels = self.ax.get_yticklabels()
@@ -79,12 +126,14 @@ def _plot_amplifier_outputs(self):
         )
 
     def _create_plot(self):
+        import matplotlib.pyplot as plt
+
         self.fig, self.ax = plt.subplots(figsize=(8, 6))
         plt.subplots_adjust(left=0.1, bottom=0.25)
 
     def compute_nonlinear_amplifier_output(self, amplitude):
         """Compute nonlinear amplifier output"""
-        return np.tanh(amplitude * self.input_signal)
+        return self._amplifier_engine.compute_nonlinear_output(amplitude)
 
     def compute_linear_amplifier_output(self, amplitude):
         """Compute linear amplifier output"""
@@ -92,64 +141,24 @@ def compute_linear_amplifier_output(self, amplitude):
 
     def _update(self, val):
         """Update the plot based on the slider value."""
-        amplitude = self.slider.val
-        self.nonlinear_amplifier_output = (
-            self.compute_nonlinear_amplifier_output(amplitude)
-        )
-        self.linear_amplifier_output = self.compute_linear_amplifier_output(
-            amplitude
-        )
-        self.nonlinear_amplifier_line_plot.set_ydata(
-            self.nonlinear_amplifier_output
-        )
-        self.linear_amplifier_line_plot.set_ydata(self.linear_amplifier_output)
-        self.ax.legend(["Nonlinear", "Linear"], loc="upper right")
-        self.fig.canvas.draw_idle()
-
-
-class ADCModel:
-    """Model an analog to digital converter."""
-
-    def __init__(self, bit_depth=3):
-        self.bit_depth = bit_depth
-        self.quantization_levels = 2**self.bit_depth
-
-    def quantize_signal(self, time_seconds, input_signal):
-        """Quantize the signal."""
-        self.time_seconds = time_seconds
-        self.analog_signal = input_signal
-        signal_minimum = np.min(input_signal)
-        input_signal_no_offset = input_signal - signal_minimum
-        scaling_factor = (self.quantization_levels - 1) / np.max(
-            input_signal_no_offset
-        )
-        input_signal_no_offset_scaled = input_signal_no_offset * scaling_factor
-        input_signal_digitized = np.round(input_signal_no_offset_scaled)
-        self.digital_signal = (
-            input_signal_digitized / scaling_factor + signal_minimum
-        )
-
-    def plot_signals(self):
-        """Plot the input analog signal and the output digitized signal."""
-        plt.figure(figsize=(10, 6))
-        plt.plot(
-            self.time_seconds,
-            self.analog_signal,
-            label="Input Signal",
-            linestyle="-",
-            color="black",
-        )
-        plt.step(
-            self.time_seconds,
-            self.digital_signal,
-            label="Quantized Signal",
-            linestyle="--",
-            color="black",
-            where="mid",
-        )
-
-        plt.xlabel(r"$t$ (s)", usetex=True)
-        plt.ylabel(r"$x$ (V)", usetex=True)
-        plt.title(f"ADC with Bit Depth = {self.bit_depth}")
-        plt.legend()
-        plt.show()
+        with measure_phase(self.latency_recorder, "update"):
+            with measure_phase(self.latency_recorder, "numeric"):
+                amplitude = self.slider.val
+                self.nonlinear_amplifier_output = (
+                    self.compute_nonlinear_amplifier_output(amplitude)
+                )
+                self.linear_amplifier_output = (
+                    self.compute_linear_amplifier_output(amplitude)
+                )
+            with measure_phase(self.latency_recorder, "artists"):
+                self.nonlinear_amplifier_line_plot.set_ydata(
+                    self.nonlinear_amplifier_output
+                )
+                self.linear_amplifier_line_plot.set_ydata(
+                    self.linear_amplifier_output
+                )
+            if self._blit_manager is not None:
+                with measure_phase(self.latency_recorder, "draw"):
+                    self._blit_manager.update()
+            else:
+                self.fig.canvas.draw_idle()
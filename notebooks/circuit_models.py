@@ -0,0 +1,488 @@
+"""Provides the numeric circuit models used by the circuit demos.
+
+Only ADCModel.plot_signals needs matplotlib, and it imports it when called.
+"""
+
+import numpy as np
+from caching import LRUCache
+from label_rendering import apply_text_renderer
+
+# The largest magnitude of the second derivative of tanh, 4 / (3 * sqrt(3)),
+# which bounds the error of linear interpolation between table points.
+_TANH_MAX_CURVATURE = 4 / (3 * np.sqrt(3))
+
+
+class TanhLookupTable:
+    """Approximate tanh by linear interpolation in a uniform lookup table.
+
+    The table spacing and range are chosen so the absolute error is at most
+    max_error everywhere.
+    """
+
+    def __init__(self, max_error=1e-4):
+        if not 0 < max_error < 1:
+            raise ValueError("max_error must be between 0 and 1")
+        self.max_error = max_error
+        # Half of the error budget goes to interpolation and half to clamping
+        # inputs beyond the end of the table to its last value.
+        self._x_max = np.arctanh(1 - max_error / 2)
+        step = np.sqrt(8 * (max_error / 2) / _TANH_MAX_CURVATURE)
+        n_points = int(np.ceil(self._x_max / step)) + 1
+        self._x_points = np.linspace(0, self._x_max, n_points)
+        self._inverse_step = (n_points - 1) / self._x_max
+        self._table = np.tanh(self._x_points)
+        self._slopes = np.diff(self._table, append=self._table[-1])
+
+    def __call__(self, x, out=None):
+        """Evaluate the approximate tanh of x.
+
+        Args:
+            x: array-like, the input values.
+            out: optional floating point array to write the result into.
+
+        Returns:
+            The approximate tanh of x.
+        """
+        x = np.asarray(x, dtype=float)
+        position = np.abs(x)
+        position *= self._inverse_step
+        np.minimum(position, self._x_points.shape[0] - 1, out=position)
+        index = position.astype(np.intp)
+        position -= index
+        position *= self._slopes[index]
+        position += self._table[index]
+        return np.copysign(position, x, out=out)
+
+
+class AmplifierEngine:
+    """Compute amplifier outputs with caching and optional fast tanh.
+
+    Nonlinear outputs for amplitudes on a grid of amplitude_resolution, which
+    matches the step of the demo slider, are kept in a least recently used
+    cache. Amplitudes off the grid are computed exactly and not cached.
+    Exact np.tanh is used unless tanh_max_error is given, since SIMD builds
+    of NumPy often evaluate it faster than a table lookup.
+    """
+
+    def __init__(
+        self,
+        input_signal,
+        cache_size=64,
+        amplitude_resolution=0.1,
+        tanh_max_error=None,
+    ):
+        self.input_signal = np.asarray(input_signal, dtype=float)
+        self.cache_size = cache_size
+        self.amplitude_resolution = amplitude_resolution
+        self._tanh = np.tanh
+        if tanh_max_error is not None:
+            self._tanh = TanhLookupTable(tanh_max_error)
+        self._outputs: LRUCache[int, np.ndarray] = LRUCache(cache_size)
+
+    def compute_nonlinear_output(self, amplitude):
+        """Compute the nonlinear amplifier output for one amplitude.
+
+        The returned array is shared with the cache and is read-only.
+        """
+        key = round(amplitude / self.amplitude_resolution)
+        grid_amplitude = key * self.amplitude_resolution
+        # Slider values carry floating point error from their step arithmetic,
+        # so amplitudes within a small tolerance of the grid share an entry.
+        if not np.isclose(amplitude, grid_amplitude, rtol=1e-9, atol=1e-12):
+            output = np.multiply(amplitude, self.input_signal)
+            return self._tanh(output, out=output)
+        output = self._outputs.get(key)
+        if output is not None:
+            return output
+        output = np.multiply(grid_amplitude, self.input_signal)
+        output = self._tanh(output, out=output)
+        output.setflags(write=False)
+        self._outputs.put(key, output)
+        return output
+
+    def compute_nonlinear_outputs(self, amplitudes, out=None):
+        """Compute nonlinear amplifier outputs for a vector of amplitudes.
+
+        Args:
+            amplitudes: array-like, shape (k, ), the amplitudes to sweep.
+            out: optional array, shape (k, n), to write the outputs into.
+
+        Returns:
+            The outputs as an array of shape (k, n), one row per amplitude.
+        """
+        outputs = np.multiply.outer(
+            np.asarray(amplitudes, dtype=float), self.input_signal, out=out
+        )
+        return self._tanh(outputs, out=outputs)
+
+
+class HarmonicDistortionAnalyzer:
+    """Measure harmonic distortion of the tanh amplifier model at scale.
+
+    Each operating point is an (amplitude, frequency) pair, where amplitude
+    is the amplifier gain as in AmplifierDemo and the input is a sine of
+    input_amplitude volts. Frequencies are snapped to the nearest coherent
+    frequency, an odd whole number of cycles per window, so every harmonic
+    falls exactly on an FFT bin. The sine table, window and bin indices are
+    computed once and reused for every batch of operating points.
+    """
+
+    def __init__(
+        self,
+        sample_rate_hz,
+        n_samples=4096,
+        n_harmonics=5,
+        input_amplitude=1.0,
+        window=None,
+        batch_size=256,
+    ):
+        self.sample_rate_hz = sample_rate_hz
+        self.n_samples = n_samples
+        self.n_harmonics = n_harmonics
+        self.input_amplitude = input_amplitude
+        self.batch_size = batch_size
+        if window is None:
+            window = np.ones(n_samples)
+        self.window = np.asarray(window, dtype=float)
+        # Scale bin magnitudes so a sine of amplitude a reads as power a**2/2.
+        self._power_scale = 2 / np.sum(self.window) ** 2
+        self._sine_table = input_amplitude * np.sin(
+            2 * np.pi * np.arange(n_samples) / n_samples
+        )
+        self._sample_indices = np.arange(n_samples)
+        self._harmonic_numbers = np.arange(1, n_harmonics + 1)
+        self.result_dtype = np.dtype(
+            [
+                ("amplitude", np.float64),
+                ("frequency_hz", np.float64),
+                ("coherent_frequency_hz", np.float64),
+                ("thd", np.float64),
+                ("harmonic_power", np.float64, (n_harmonics,)),
+            ]
+        )
+
+    def compute_coherent_cycles(self, frequencies_hz):
+        """Find the odd number of cycles per window nearest each frequency."""
+        cycles = np.asarray(frequencies_hz) * self.n_samples
+        cycles = cycles / self.sample_rate_hz
+        cycles = 2 * np.floor(cycles / 2) + 1
+        return np.clip(cycles, 1, self.n_samples // 2 - 1).astype(np.intp)
+
+    def _compute_harmonic_bins(self, cycles):
+        # Harmonics above the Nyquist frequency alias back into the spectrum.
+        bins = np.multiply.outer(cycles, self._harmonic_numbers)
+        bins %= self.n_samples
+        return np.minimum(bins, self.n_samples - bins)
+
+    def _analyze_batch(self, amplitudes, cycles):
+        table_indices = np.multiply.outer(cycles, self._sample_indices)
+        table_indices %= self.n_samples
+        output_signals = self._sine_table[table_indices]
+        output_signals *= amplitudes[:, np.newaxis]
+        np.tanh(output_signals, out=output_signals)
+        output_signals *= self.window
+        spectra = np.fft.rfft(output_signals, axis=1)
+        harmonic_bins = self._compute_harmonic_bins(cycles)
+        harmonic_spectra = np.take_along_axis(spectra, harmonic_bins, axis=1)
+        return np.abs(harmonic_spectra) ** 2 * self._power_scale
+
+    def analyze(self, amplitudes, frequencies_hz):
+        """Compute THD and harmonic powers over a grid of operating points.
+
+        Args:
+            amplitudes: array-like, the amplifier gains.
+            frequencies_hz: array-like, the input frequencies, broadcast
+                against amplitudes.
+
+        Returns:
+            A structured array with one record per operating point holding the
+            amplitude, requested and coherent frequencies, the total harmonic
+            distortion as a ratio of RMS voltages, and the power of each
+            harmonic in V**2, starting with the fundamental.
+        """
+        amplitudes, frequencies_hz = np.broadcast_arrays(
+            np.asarray(amplitudes, dtype=float),
+            np.asarray(frequencies_hz, dtype=float),
+        )
+        results = np.empty(amplitudes.shape, dtype=self.result_dtype)
+        flat_results = results.reshape(-1)
+        flat_results["amplitude"] = amplitudes.reshape(-1)
+        flat_results["frequency_hz"] = frequencies_hz.reshape(-1)
+        cycles = self.compute_coherent_cycles(flat_results["frequency_hz"])
+        flat_results["coherent_frequency_hz"] = (
+            cycles * self.sample_rate_hz / self.n_samples
+        )
+        for start in range(0, flat_results.shape[0], self.batch_size):
+            batch = slice(start, start + self.batch_size)
+            flat_results["harmonic_power"][batch] = self._analyze_batch(
+                flat_results["amplitude"][batch], cycles[batch]
+            )
+        harmonic_power = flat_results["harmonic_power"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            flat_results["thd"] = np.sqrt(
+                np.sum(harmonic_power[:, 1:], axis=1) / harmonic_power[:, 0]
+            )
+        return results
+
+
+class ADCModel:
+    """Model an analog to digital converter."""
+
+    def __init__(self, bit_depth=3, signal_minimum=None, signal_maximum=None):
+        self.bit_depth = bit_depth
+        self.quantization_levels = 2**self.bit_depth
+        self.signal_minimum = None
+        self.scaling_factor = None
+        if signal_minimum is not None and signal_maximum is not None:
+            self.set_calibration(signal_minimum, signal_maximum)
+
+    def set_calibration(self, signal_minimum, signal_maximum):
+        """Fix the input range used to map volts onto quantization levels.
+
+        Args:
+            signal_minimum: The input voltage mapped to the lowest level.
+            signal_maximum: The input voltage mapped to the highest level.
+
+        Returns:
+            None
+        """
+        self.signal_minimum, self.scaling_factor = self._compute_calibration(
+            signal_minimum, signal_maximum
+        )
+
+    def _compute_calibration(self, signal_minimum, signal_maximum):
+        if signal_maximum <= signal_minimum:
+            raise ValueError("signal_maximum must exceed signal_minimum")
+        scaling_factor = (self.quantization_levels - 1) / (
+            signal_maximum - signal_minimum
+        )
+        return signal_minimum, scaling_factor
+
+    @staticmethod
+    def _find_signal_range(input_chunks):
+        # The range is kept as Python floats, so integer input does not make
+        # the calibration integer.
+        signal_minimum = np.inf
+        signal_maximum = -np.inf
+        for input_chunk in input_chunks:
+            signal_minimum = min(signal_minimum, float(np.min(input_chunk)))
+            signal_maximum = max(signal_maximum, float(np.max(input_chunk)))
+        return signal_minimum, signal_maximum
+
+    def _get_calibration(self, input_chunks):
+        # Uncalibrated models use the range of the signal being quantized,
+        # like quantize_signal, without storing it on the model.
+        if self.scaling_factor is not None:
+            return self.signal_minimum, self.scaling_factor
+        return self._compute_calibration(
+            *self._find_signal_range(input_chunks)
+        )
+
+    def calibrate(self, input_chunks):
+        """Calibrate the input range with a first pass over signal chunks.
+
+        Args:
+            input_chunks: iterable of array-like chunks of the input signal.
+
+        Returns:
+            None
+        """
+        self.set_calibration(*self._find_signal_range(input_chunks))
+
+    @property
+    def code_dtype(self):
+        """The smallest unsigned integer dtype that holds every code."""
+        return np.min_scalar_type(self.quantization_levels - 1)
+
+    def quantize_to_codes(self, input_signal, out=None, overwrite_input=False):
+        """Quantize a signal into raw integer codes.
+
+        Codes are stored in the smallest unsigned integer dtype that fits the
+        bit depth (e.g. uint8 for up to 8 bits). If the ADC has not been
+        calibrated, the input minimum and maximum are used, as in
+        quantize_signal, but they are not stored, so call set_calibration or
+        calibrate first to dequantize the codes. Samples outside the
+        calibrated range are clipped.
+
+        Args:
+            input_signal: array-like, the input signal in volts.
+            out: optional integer array to write the codes into.
+            overwrite_input: if True, a floating point input_signal is used as
+                scratch space, so no intermediate arrays are allocated.
+
+        Returns:
+            The array of integer codes.
+        """
+        signal_minimum, scaling_factor = self._get_calibration([input_signal])
+        input_is_float_array = isinstance(input_signal, np.ndarray) and (
+            np.issubdtype(input_signal.dtype, np.floating)
+        )
+        scratch = None
+        if overwrite_input and input_is_float_array:
+            scratch = input_signal
+        levels = self._quantize_to_levels(
+            input_signal, signal_minimum, scaling_factor, out=scratch
+        )
+        if out is None:
+            return levels.astype(self.code_dtype)
+        out[...] = levels
+        return out
+
+    def dequantize_codes(self, codes, out=None):
+        """Reconstruct the quantized signal in volts from integer codes.
+
+        Args:
+            codes: array-like of integer codes from quantize_to_codes.
+            out: optional floating point array to write the volts into.
+
+        Returns:
+            The quantized signal in volts.
+        """
+        if self.scaling_factor is None:
+            raise RuntimeError("ADC must be calibrated before dequantizing")
+        out = np.divide(codes, self.scaling_factor, out=out)
+        out += self.signal_minimum
+        return out
+
+    def quantize_chunk(self, input_chunk):
+        """Quantize one chunk of signal using the fixed calibration.
+
+        Samples outside the calibrated range are clipped to the lowest or
+        highest quantization level.
+
+        Args:
+            input_chunk: array-like, the chunk of input signal in volts.
+
+        Returns:
+            The quantized chunk in volts, with the same shape as the input.
+        """
+        if self.scaling_factor is None:
+            raise RuntimeError("ADC must be calibrated before quantizing")
+        return self._quantize_to_volts(
+            input_chunk, self.signal_minimum, self.scaling_factor
+        )
+
+    def _quantize_to_levels(
+        self, input_signal, signal_minimum, scaling_factor, out=None
+    ):
+        # Integer input, e.g. raw captures, is quantized in float64 unless
+        # the caller provides a floating point work array.
+        if out is None:
+            levels = np.subtract(
+                input_signal, signal_minimum, dtype=np.float64
+            )
+        else:
+            levels = np.subtract(input_signal, signal_minimum, out=out)
+        levels *= scaling_factor
+        np.rint(levels, out=levels)
+        np.clip(levels, 0, self.quantization_levels - 1, out=levels)
+        return levels
+
+    def _quantize_to_volts(self, input_signal, signal_minimum, scaling_factor):
+        volts = self._quantize_to_levels(
+            input_signal, signal_minimum, scaling_factor
+        )
+        volts /= scaling_factor
+        volts += signal_minimum
+        return volts
+
+    def quantize_stream(self, input_chunks):
+        """Quantize a stream of signal chunks, yielding one chunk at a time.
+
+        Peak memory is bounded by the chunk size rather than the length of the
+        whole record. The ADC must already be calibrated.
+
+        Args:
+            input_chunks: iterable of array-like chunks of the input signal.
+
+        Yields:
+            The quantized chunks in volts.
+        """
+        for input_chunk in input_chunks:
+            yield self.quantize_chunk(input_chunk)
+
+    def quantize_blockwise(self, input_signal, out=None, chunk_size=2**20):
+        """Quantize a large or memory-mapped array block by block.
+
+        If the ADC has not been calibrated, a first pass over the blocks finds
+        the signal minimum and maximum. They are used for this signal only
+        and are not stored on the model.
+
+        Args:
+            input_signal: array-like, shape (n, ), e.g. a numpy.memmap.
+            out: optional array, shape (n, ), to write quantized volts into.
+            chunk_size: the number of samples processed per block.
+
+        Returns:
+            The output array holding the quantized signal in volts.
+        """
+        n_samples = len(input_signal)
+        block_starts = range(0, n_samples, chunk_size)
+        signal_minimum, scaling_factor = self._get_calibration(
+            input_signal[start : start + chunk_size] for start in block_starts
+        )
+        if out is None:
+            out = np.empty(n_samples)
+        for start in block_starts:
+            out[start : start + chunk_size] = self._quantize_to_volts(
+                input_signal[start : start + chunk_size],
+                signal_minimum,
+                scaling_factor,
+            )
+        return out
+
+    def quantize_signal(self, time_seconds, input_signal):
+        """Quantize the signal."""
+        self.time_seconds = time_seconds
+        self.analog_signal = input_signal
+        signal_minimum = np.min(input_signal)
+        input_signal_no_offset = input_signal - signal_minimum
+        scaling_factor = (self.quantization_levels - 1) / np.max(
+            input_signal_no_offset
+        )
+        input_signal_no_offset_scaled = input_signal_no_offset * scaling_factor
+        input_signal_digitized = np.round(input_signal_no_offset_scaled)
+        self.digital_signal = (
+            input_signal_digitized / scaling_factor + signal_minimum
+        )
+
+    def plot_signals(self, text_renderer="usetex", ax=None):
+        """Plot the input analog signal and the output digitized signal.
+
+        Args:
+            text_renderer: how to render the axis labels, one of
+                label_rendering.TEXT_RENDERERS.
+            ax: Optional matplotlib.axes.Axes to draw into. By default a new
+                figure is created and shown.
+
+        Returns:
+            None
+        """
+        import matplotlib.pyplot as plt
+
+        show = ax is None
+        if ax is None:
+            _, ax = plt.subplots(figsize=(10, 6))
+        ax.plot(
+            self.time_seconds,
+            self.analog_signal,
+            label="Input Signal",
+            linestyle="-",
+            color="black",
+        )
+        ax.step(
+            self.time_seconds,
+            self.digital_signal,
+            label="Quantized Signal",
+            linestyle="--",
+            color="black",
+            where="mid",
+        )
+
+        x_label = ax.set_xlabel(r"$t$ (s)")
+        y_label = ax.set_ylabel(r"$x$ (V)")
+        apply_text_renderer([x_label, y_label], text_renderer)
+        ax.set_title(f"ADC with Bit Depth = {self.bit_depth}")
+        ax.legend()
+        if show:
+            plt.show()
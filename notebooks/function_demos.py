@@ -1,6 +1,7 @@
 """Provides simple tools for demonstrating linear and nonlinear functions"""
 
 import numpy as np
+from matplotlib.collections import PolyCollection
 
 
 def plot_dx(
@@ -31,8 +32,10 @@ def plot_dx(
         None
     """
     x1 = x0_start_value + dx_change
-    y_lower_edge = f_function(x_array)
-    y_lower_edge[x_array <= x0_start_value] = f_function(x0_start_value)
+    y_array = f_function(x_array)
+    y_lower_edge = np.where(
+        x_array <= x0_start_value, f_function(x0_start_value), y_array
+    )
     plot_axis.fill_between(
         x_array,
         y_lower_edge,
@@ -43,8 +46,8 @@ def plot_dx(
     )
     plot_axis.fill_between(
         x_array,
-        np.min(f_function(x_array)),
-        f_function(x_array),
+        np.min(y_array),
+        y_array,
         where=(x_array >= x0_start_value) & (x_array <= x1),
         facecolor=color_string,
         alpha=alpha_value,
@@ -67,6 +70,10 @@ def plot_dx_list(
     dx_change_values_list, in input values, the values of x0_start_values_list
     affect the outputs of a function, f_function.
 
+    The function is evaluated once over x_array and once over each of the
+    start and end values, so f_function must accept arrays, and x_array must
+    be sorted. All polygons are drawn as a single PolyCollection.
+
     Args:
         plot_axis: the axis of the plot to add the polygons to.
         x_array: array-like, shape (n,), the array of x values of the function.
@@ -79,5 +86,77 @@ def plot_dx_list(
     Returns:
         None
     """
-    for x0, dx, color in zip(x0_start_values, dx_change_values, color_strings):
-        plot_dx(plot_axis, x_array, f_function, x0, dx, color, alpha_value)
+    x_array = np.asarray(x_array)
+    x0_values = np.asarray(x0_start_values, dtype=float)
+    x1_values = x0_values + np.asarray(dx_change_values, dtype=float)
+    y_array = f_function(x_array)
+    y0_values = f_function(x0_values)
+    y1_values = f_function(x1_values)
+
+    # Bands between the curve, held at f(x0) left of x0, and the level f(x1)
+    band_indices, band_groups, band_counts = _gather_index_ranges(
+        np.zeros(x0_values.shape, dtype=np.intp),
+        np.searchsorted(x_array, x1_values, side="left"),
+    )
+    band_x = x_array[band_indices]
+    band_edge = np.where(
+        band_x <= x0_values[band_groups],
+        y0_values[band_groups],
+        y_array[band_indices],
+    )
+    band_polygons = _build_fill_polygons(
+        band_x, band_edge, y1_values, band_groups, band_counts
+    )
+
+    # Strips between the curve and its minimum for x0 <= x <= x1
+    strip_indices, strip_groups, strip_counts = _gather_index_ranges(
+        np.searchsorted(x_array, x0_values, side="left"),
+        np.searchsorted(x_array, x1_values, side="right"),
+    )
+    strip_polygons = _build_fill_polygons(
+        x_array[strip_indices],
+        y_array[strip_indices],
+        np.full(x0_values.shape, np.min(y_array)),
+        strip_groups,
+        strip_counts,
+    )
+
+    polygons = []
+    facecolors = []
+    for band, strip, color in zip(
+        band_polygons, strip_polygons, color_strings
+    ):
+        for polygon in (band, strip):
+            if polygon.shape[0] > 0:
+                polygons.append(polygon)
+                facecolors.append(color)
+    plot_axis.add_collection(
+        PolyCollection(polygons, facecolors=facecolors, alpha=alpha_value)
+    )
+    plot_axis.autoscale_view()
+
+
+def _gather_index_ranges(start_indices, stop_indices):
+    # Concatenate the index ranges [start, stop) of every group, returning the
+    # indices, the group each index belongs to and the size of each group.
+    counts = np.maximum(stop_indices - start_indices, 0)
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+    groups = np.repeat(np.arange(counts.shape[0]), counts)
+    local_indices = np.arange(offsets[-1]) - offsets[groups]
+    return start_indices[groups] + local_indices, groups, counts
+
+
+def _build_fill_polygons(x_values, edge_values, level_values, groups, counts):
+    # Each polygon runs forward along its edge, then back along a constant
+    # level, matching the polygons made by fill_between.
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+    local_indices = np.arange(offsets[-1]) - offsets[groups]
+    forward_positions = 2 * offsets[groups] + local_indices
+    backward_positions = 2 * offsets[groups] + 2 * counts[groups] - 1
+    backward_positions -= local_indices
+    vertices = np.empty((2 * offsets[-1], 2))
+    vertices[forward_positions, 0] = x_values
+    vertices[forward_positions, 1] = edge_values
+    vertices[backward_positions, 0] = x_values
+    vertices[backward_positions, 1] = level_values[groups]
+    return np.split(vertices, 2 * offsets[1:-1])
@@ -0,0 +1,172 @@
+"""Provides opt-in latency instrumentation for the interactive demos.
+
+Demos accept a LatencyRecorder and time each slider update in phases:
+
+- "update": the whole slider callback.
+- "numeric": recomputing the values to display.
+- "artists": pushing the new values into matplotlib artists.
+- "draw": rendering, either a full canvas draw or a blit.
+
+An update that is superseded by another before anything is drawn is counted
+as dropped. When no recorder is given, measure_phase returns a shared no-op
+context manager, so the demos pay almost nothing for the instrumentation.
+"""
+
+import json
+import time
+from contextlib import nullcontext
+
+import numpy as np
+
+PHASES = ("update", "numeric", "artists", "draw")
+
+_NO_OP_CONTEXT = nullcontext()
+
+
+class _PhaseTimer:
+    def __init__(self, recorder, phase):
+        self._recorder = recorder
+        self._phase = phase
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        if self._phase == "update":
+            self._recorder.n_pending_updates += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._recorder.record(
+            self._phase, self._start, time.perf_counter() - self._start
+        )
+        if self._phase == "draw":
+            self._recorder.n_dropped_events += max(
+                self._recorder.n_pending_updates - 1, 0
+            )
+            self._recorder.n_pending_updates = 0
+        return False
+
+
+class LatencyRecorder:
+    """Record per-phase interaction latencies in fixed-size ring buffers.
+
+    Only the most recent capacity timings of each phase are kept, so the
+    memory used does not grow however long the demo runs.
+    """
+
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self._start_times = {phase: np.zeros(capacity) for phase in PHASES}
+        self._durations = {phase: np.zeros(capacity) for phase in PHASES}
+        self._counts = dict.fromkeys(PHASES, 0)
+        self.n_pending_updates = 0
+        self.n_dropped_events = 0
+
+    def phase(self, phase):
+        """Return a context manager that times one phase."""
+        if phase not in PHASES:
+            raise ValueError(f"Unknown phase: {phase}")
+        return _PhaseTimer(self, phase)
+
+    def record(self, phase, start_time, duration):
+        """Store one timing, overwriting the oldest once the buffer is full.
+
+        Args:
+            phase: the name of the phase, one of PHASES.
+            start_time: the time.perf_counter value at the start, in seconds.
+            duration: the duration of the phase in seconds.
+
+        Returns:
+            None
+        """
+        index = self._counts[phase] % self.capacity
+        self._start_times[phase][index] = start_time
+        self._durations[phase][index] = duration
+        self._counts[phase] += 1
+
+    def _get_recorded(self, timings, phase):
+        return timings[phase][: min(self._counts[phase], self.capacity)]
+
+    def instrument_canvas(self, canvas):
+        """Time every full draw of a canvas as the "draw" phase.
+
+        Args:
+            canvas: the matplotlib canvas to instrument.
+
+        Returns:
+            None
+        """
+        draw = canvas.draw
+
+        def timed_draw(*args, **kwargs):
+            with self.phase("draw"):
+                return draw(*args, **kwargs)
+
+        canvas.draw = timed_draw
+
+    def summary(self):
+        """Summarize the recorded latencies.
+
+        Returns:
+            A dict mapping each phase to its count and p50, p95 and p99
+            latencies in milliseconds, plus the number of dropped events.
+        """
+        phase_summaries = {}
+        for phase in PHASES:
+            durations = self._get_recorded(self._durations, phase)
+            phase_summary = {"count": self._counts[phase]}
+            for percentile in (50, 95, 99):
+                phase_summary[f"p{percentile}_ms"] = (
+                    float(np.percentile(durations, percentile)) * 1e3
+                    if durations.size
+                    else None
+                )
+            phase_summaries[phase] = phase_summary
+        return {
+            "phases": phase_summaries,
+            "dropped_events": self.n_dropped_events,
+        }
+
+    def dump_trace(self, path):
+        """Write the recorded timings as a Chrome trace event file.
+
+        The file can be opened in chrome://tracing or Perfetto.
+
+        Args:
+            path: the path of the JSON file to write.
+
+        Returns:
+            None
+        """
+        trace_events = []
+        for thread_id, phase in enumerate(PHASES):
+            start_times = self._get_recorded(self._start_times, phase)
+            durations = self._get_recorded(self._durations, phase)
+            for start_time, duration in zip(start_times, durations):
+                trace_events.append(
+                    {
+                        "name": phase,
+                        "ph": "X",
+                        "ts": start_time * 1e6,
+                        "dur": duration * 1e6,
+                        "pid": 0,
+                        "tid": thread_id,
+                    }
+                )
+        trace_events.sort(key=lambda event: event["ts"])
+        with open(path, "w") as trace_file:
+            json.dump({"traceEvents": trace_events}, trace_file)
+
+
+def measure_phase(recorder, phase):
+    """Time a phase if a recorder is given, or do nothing otherwise.
+
+    Args:
+        recorder: a LatencyRecorder, or None when instrumentation is off.
+        phase: the name of the phase, one of PHASES.
+
+    Returns:
+        A context manager.
+    """
+    if recorder is None:
+        return _NO_OP_CONTEXT
+    return recorder.phase(phase)
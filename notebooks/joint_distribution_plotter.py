@@ -4,51 +4,38 @@
 https://matplotlib.org/stable/gallery/statistics/confidence_ellipse.html
 """
 
-import matplotlib.pyplot as plt
-import matplotlib.transforms as transforms
 import numpy as np
-from matplotlib.patches import Ellipse
+from joint_distribution_statistics import (  # noqa: F401
+    BivariateMoments,
+    compute_adaptive_bins,
+    compute_safe_pearson_coefficient,
+    compute_uniform_bin_indices,
+)
 
 
-def compute_safe_pearson_coefficient(cov):
-    """Compute Pearson Correlation Coefficient and set to zero if undefined.
-
-    Uses the covariance matrix between two variables to compute the Pearson
-    Correlation Coefficient (PCC) between them. A zero value is returned if the
-    value of the PCC would have been undefined.
-
-    Args:
-        cov: 2x2 covariance matrix
-
-    Returns:
-        float
-    """
-    pearson_numerator = cov[0, 1]
-    pearson_denominator = np.sqrt(cov[0, 0] * cov[1, 1])
-    if pearson_denominator == 0:
-        pearson = 0
-    else:
-        pearson = pearson_numerator / pearson_denominator
-    return pearson
-
-
-def confidence_ellipse(x, y, ax, n_std=3.0, facecolor="none", **kwargs):
+def confidence_ellipse(
+    x, y, ax, n_std=3.0, facecolor="none", moments=None, **kwargs
+):
     """Plot the covariance confidence ellipse of x and y.
 
     Args:
-        x: array-like, shape (n, ) input data.
-        y: array-like, shape (n, ) input data.
+        x: array-like, shape (n, ) input data. Ignored if moments is given.
+        y: array-like, shape (n, ) input data. Ignored if moments is given.
         ax: matplotlib.axes.Axes object to draw the ellipse into.
         n_std: The number of standard deviations to determine ellipse radiuses.
+        moments: Optional precomputed BivariateMoments of x and y.
         **kwargs: Forwarded to `~matplotlib.patches.Ellipse`
 
     Returns:
         matplotlib.patches.Ellipse
     """
-    if x.size != y.size:
-        raise ValueError("x and y must be the same size")
+    import matplotlib.transforms as transforms
+    from matplotlib.patches import Ellipse
+
+    if moments is None:
+        moments = BivariateMoments.from_arrays(x, y)
 
-    cov = np.cov(x, y)
+    cov = moments.covariance
 
     pearson = compute_safe_pearson_coefficient(cov)
 
@@ -60,15 +47,15 @@ def confidence_ellipse(x, y, ax, n_std=3.0, facecolor="none", **kwargs):
         width=ell_radius_x * 2,
         height=ell_radius_y * 2,
         facecolor=facecolor,
-        **kwargs
+        **kwargs,
     )
 
     # Calculating the standard deviation from the square root of the
     # variance and multiplying with the given number of standard deviations.
     scale_x = np.sqrt(cov[0, 0]) * n_std
-    mean_x = np.mean(x)
+    mean_x = moments.mean_x
     scale_y = np.sqrt(cov[1, 1]) * n_std
-    mean_y = np.mean(y)
+    mean_y = moments.mean_y
 
     transf = (
         transforms.Affine2D()
@@ -81,7 +68,7 @@ def confidence_ellipse(x, y, ax, n_std=3.0, facecolor="none", **kwargs):
     return ax.add_patch(ellipse)
 
 
-def scatter_hist(x, y, ax, ax_hist_x, ax_hist_y):
+def scatter_hist(x, y, ax, ax_hist_x, ax_hist_y, bins=None):
     """Make a scatter plot with histograms in the marginals
 
     Args:
@@ -90,6 +77,8 @@ def scatter_hist(x, y, ax, ax_hist_x, ax_hist_y):
         ax: matplotlib.axes.Axes object to draw the ellipse into.
         ax_hist_x: matplotlib.axes.Axes object to draw the ellipse into.
         ax_hist_y: matplotlib.axes.Axes object to draw the ellipse into.
+        bins: Optional bin edges shared by both marginals. By default they
+            are chosen with compute_adaptive_bins.
 
     Returns:
         None
@@ -103,31 +92,145 @@ def scatter_hist(x, y, ax, ax_hist_x, ax_hist_y):
     ax.scatter(x, y, c="black", alpha=0.5)
     ax.set_aspect("equal", adjustable="box")
 
-    # Determine nice limits by hand
-    bin_width = 0.25
-    xy_max = max(np.max(np.abs(x)), np.max(np.abs(y)))
-    lim = (int(xy_max / bin_width) + 1) * bin_width
-
     # Plot the marginal distributions
-    bins = np.arange(-lim, lim + bin_width, bin_width)
+    if bins is None:
+        bins = compute_adaptive_bins(x, y)
     ax_hist_x.hist(x, bins=bins, color="black", alpha=0.5)
     ax_hist_y.hist(
         y, bins=bins, orientation="horizontal", color="black", alpha=0.5
     )
 
 
-def plot_joint_distribution(x, y, title):
+def density_hist(
+    x,
+    y,
+    ax,
+    ax_hist_x,
+    ax_hist_y,
+    bins=None,
+    contour_levels=None,
+    outlier_count=2,
+    n_outliers=1000,
+    rng=None,
+):
+    """Make a 2-D histogram image with histograms in the marginals
+
+    The points are binned once, both marginals are summed from the same grid,
+    and only points in sparsely populated bins are drawn individually, from a
+    random subsample. The number of artists does not grow with the data.
+
+    Args:
+        x: array-like, shape (n, ) input data.
+        y: array-like, shape (n, ) input data.
+        ax: matplotlib.axes.Axes object to draw the image into.
+        ax_hist_x: matplotlib.axes.Axes object to draw the x marginal into.
+        ax_hist_y: matplotlib.axes.Axes object to draw the y marginal into.
+        bins: Optional uniformly spaced bin edges shared by x and y. By
+            default they are chosen with compute_adaptive_bins.
+        contour_levels: Optional number or list of density contour levels.
+        outlier_count: Points in bins with at most this many points are drawn
+            as individual outliers.
+        n_outliers: The maximum number of outlier points to draw.
+        rng: Optional numpy.random.Generator used to subsample outliers. A
+            fixed seed is used by default, so the figure is reproducible.
+
+    Returns:
+        None
+    """
+    import matplotlib.pyplot as plt
+
+    if rng is None:
+        rng = np.random.default_rng(0)
+    if bins is None:
+        bins = compute_adaptive_bins(x, y, rng=rng)
+    n_bins = len(bins) - 1
+
+    # Bin every point in a single pass
+    flat_bin_indices = compute_uniform_bin_indices(x, bins) * n_bins
+    flat_bin_indices += compute_uniform_bin_indices(y, bins)
+    counts = np.bincount(flat_bin_indices, minlength=n_bins**2).reshape(
+        n_bins, n_bins
+    )
+
+    # Remove labels
+    ax_hist_x.tick_params(axis="x", labelbottom=False)
+    ax_hist_y.tick_params(axis="y", labelleft=False)
+
+    # Draw the density image, leaving empty bins blank
+    cmap = plt.get_cmap("Greys").with_extremes(bad="white")
+    ax.imshow(
+        np.ma.masked_equal(counts.T, 0),
+        extent=[bins[0], bins[-1], bins[0], bins[-1]],
+        origin="lower",
+        cmap=cmap,
+        interpolation="nearest",
+    )
+    ax.set_aspect("equal", adjustable="box")
+    if contour_levels is not None:
+        bin_centers = (bins[:-1] + bins[1:]) / 2
+        ax.contour(
+            bin_centers,
+            bin_centers,
+            counts.T,
+            levels=contour_levels,
+            colors="black",
+            linewidths=1,
+        )
+
+    # Overlay a random subsample of points in sparse bins
+    outlier_indices = np.flatnonzero(
+        counts.reshape(-1)[flat_bin_indices] <= outlier_count
+    )
+    if outlier_indices.size > n_outliers:
+        outlier_indices = rng.choice(
+            outlier_indices, n_outliers, replace=False
+        )
+    ax.scatter(
+        np.asarray(x)[outlier_indices],
+        np.asarray(y)[outlier_indices],
+        c="black",
+        s=4,
+        alpha=0.5,
+    )
+
+    # Plot the marginal distributions from the same grid
+    ax_hist_x.stairs(
+        counts.sum(axis=1), bins, fill=True, color="black", alpha=0.5
+    )
+    ax_hist_y.stairs(
+        counts.sum(axis=0),
+        bins,
+        orientation="horizontal",
+        fill=True,
+        color="black",
+        alpha=0.5,
+    )
+
+
+def plot_joint_distribution(
+    x, y, title, mode="scatter", fig=None, **density_kwargs
+):
     """Plots a joint distribution, showing marginals and confidence ellipse
 
     Args:
         x: array-like, shape (n, ) input data.
         y: array-like, shape (n, ) input data.
         title: Title of the plot to be made.
+        mode: "scatter" to draw every point, or "density" to draw a binned
+            image, which renders in constant time for large data.
+        fig: Optional empty matplotlib.figure.Figure to draw into, e.g. one
+            cleared and reused across many plots. A new figure by default.
+        **density_kwargs: Forwarded to density_hist in "density" mode.
 
     Returns:
         None
     """
-    fig = plt.figure(layout="constrained")
+    import matplotlib.pyplot as plt
+
+    if mode not in ("scatter", "density"):
+        raise ValueError(f"Unknown plot mode: {mode}")
+    if fig is None:
+        fig = plt.figure(layout="constrained")
 
     # Create the main axes, leaving 25% of the figure space at the top and on
     # the right to position marginals.
@@ -144,12 +247,17 @@ def plot_joint_distribution(x, y, title):
     ax_hist_x = ax.inset_axes([0, 1.05, 1, 0.25], sharex=ax)
     ax_hist_y = ax.inset_axes([1.05, 0, 0.25, 1], sharey=ax)
 
-    # Draw the scatter plot and marginals.
-    scatter_hist(x, y, ax, ax_hist_x, ax_hist_y)
-
-    # Draw the confidence ellipses
-    confidence_ellipse(x, y, ax, edgecolor="black", n_std=1)
-    confidence_ellipse(x, y, ax, edgecolor="grey", n_std=2)
-    confidence_ellipse(x, y, ax, edgecolor="lightgrey", n_std=3)
+    # Draw the scatter plot or density image and marginals.
+    if mode == "scatter":
+        scatter_hist(x, y, ax, ax_hist_x, ax_hist_y)
+    else:
+        density_hist(x, y, ax, ax_hist_x, ax_hist_y, **density_kwargs)
+
+    # Draw the confidence ellipses from a single pass over the data
+    moments = BivariateMoments.from_arrays(x, y)
+    for n_std, edgecolor in zip([1, 2, 3], ["black", "grey", "lightgrey"]):
+        confidence_ellipse(
+            x, y, ax, edgecolor=edgecolor, n_std=n_std, moments=moments
+        )
 
     ax.set_title(title)
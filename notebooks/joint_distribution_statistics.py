@@ -0,0 +1,178 @@
+"""Provides the statistics used to plot joint distributions.
+
+The figures themselves are drawn by joint_distribution_plotter.
+"""
+
+import numpy as np
+
+
+class BivariateMoments:
+    """Accumulate the means and covariance of two variables in one pass.
+
+    Chunks are folded in with the pairwise update of Chan, Golub and LeVeque,
+    a batched form of Welford's algorithm, so the result is numerically
+    stable. Accumulators built on separate chunks or workers can be merged.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.mean_x = 0.0
+        self.mean_y = 0.0
+        self.m2_x = 0.0
+        self.m2_y = 0.0
+        self.c_xy = 0.0
+
+    @classmethod
+    def from_arrays(cls, x, y, chunk_size=2**20):
+        """Compute moments of possibly memory-mapped arrays chunk by chunk.
+
+        Args:
+            x: array-like, shape (n, ) input data.
+            y: array-like, shape (n, ) input data.
+            chunk_size: the number of samples read per chunk.
+
+        Returns:
+            BivariateMoments
+        """
+        if len(x) != len(y):
+            raise ValueError("x and y must be the same size")
+        moments = cls()
+        for start in range(0, len(x), chunk_size):
+            moments.update(
+                x[start : start + chunk_size], y[start : start + chunk_size]
+            )
+        return moments
+
+    def update(self, x_chunk, y_chunk):
+        """Fold a chunk of paired samples into the moments."""
+        x_chunk = np.asarray(x_chunk, dtype=float)
+        y_chunk = np.asarray(y_chunk, dtype=float)
+        if x_chunk.size != y_chunk.size:
+            raise ValueError("x and y must be the same size")
+        if x_chunk.size == 0:
+            return self
+        chunk = BivariateMoments()
+        chunk.n = x_chunk.size
+        chunk.mean_x = np.mean(x_chunk)
+        chunk.mean_y = np.mean(y_chunk)
+        x_deviation = x_chunk - chunk.mean_x
+        y_deviation = y_chunk - chunk.mean_y
+        chunk.m2_x = np.dot(x_deviation, x_deviation)
+        chunk.m2_y = np.dot(y_deviation, y_deviation)
+        chunk.c_xy = np.dot(x_deviation, y_deviation)
+        return self.merge(chunk)
+
+    def merge(self, other):
+        """Merge the moments of another accumulator into this one."""
+        n = self.n + other.n
+        if other.n == 0:
+            return self
+        delta_x = other.mean_x - self.mean_x
+        delta_y = other.mean_y - self.mean_y
+        weight = self.n * other.n / n
+        self.m2_x += other.m2_x + delta_x**2 * weight
+        self.m2_y += other.m2_y + delta_y**2 * weight
+        self.c_xy += other.c_xy + delta_x * delta_y * weight
+        self.mean_x += delta_x * other.n / n
+        self.mean_y += delta_y * other.n / n
+        self.n = n
+        return self
+
+    @property
+    def covariance(self):
+        """The 2x2 sample covariance matrix, normalized like np.cov."""
+        return np.array([[self.m2_x, self.c_xy], [self.c_xy, self.m2_y]]) / (
+            self.n - 1
+        )
+
+
+def compute_safe_pearson_coefficient(cov):
+    """Compute Pearson Correlation Coefficient and set to zero if undefined.
+
+    Uses the covariance matrix between two variables to compute the Pearson
+    Correlation Coefficient (PCC) between them. A zero value is returned if the
+    value of the PCC would have been undefined.
+
+    Args:
+        cov: 2x2 covariance matrix, or BivariateMoments
+
+    Returns:
+        float
+    """
+    if isinstance(cov, BivariateMoments):
+        cov = cov.covariance
+    pearson_numerator = cov[0, 1]
+    pearson_denominator = np.sqrt(cov[0, 0] * cov[1, 1])
+    if pearson_denominator == 0:
+        pearson = 0
+    else:
+        pearson = pearson_numerator / pearson_denominator
+    return pearson
+
+
+def compute_adaptive_bins(x, y, max_bins=256, sample_size=100_000, rng=None):
+    """Compute uniform bin edges shared by x and y from the data spread.
+
+    The bin width follows the Freedman-Diaconis rule, using interquartile
+    ranges estimated from a random sample rather than a full sort. The edges
+    cover the full range of both variables, with at most max_bins bins.
+
+    Args:
+        x: array-like, shape (n, ) input data.
+        y: array-like, shape (n, ) input data.
+        max_bins: The largest number of bins to create.
+        sample_size: The number of points sampled to estimate the spread.
+        rng: Optional numpy.random.Generator used to draw the sample. A
+            fixed seed is used by default, so the bins are reproducible.
+
+    Returns:
+        The array of bin edges.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    n_points = x.shape[0]
+    if n_points > sample_size:
+        if rng is None:
+            rng = np.random.default_rng(0)
+        sample_indices = rng.integers(0, n_points, sample_size)
+        x_sample = x[sample_indices]
+        y_sample = y[sample_indices]
+    else:
+        x_sample = x
+        y_sample = y
+    x_quartiles = np.percentile(x_sample, [25, 75])
+    y_quartiles = np.percentile(y_sample, [25, 75])
+    interquartile_range = min(
+        x_quartiles[1] - x_quartiles[0], y_quartiles[1] - y_quartiles[0]
+    )
+
+    lower_limit = min(np.min(x), np.min(y))
+    upper_limit = max(np.max(x), np.max(y))
+    data_range = upper_limit - lower_limit
+    if data_range == 0:
+        return np.array([lower_limit - 0.5, upper_limit + 0.5])
+    if interquartile_range > 0:
+        bin_width = 2 * interquartile_range / np.cbrt(n_points)
+        n_bins = int(np.ceil(data_range / bin_width))
+    else:
+        # Fall back to Sturges' rule when most values are identical.
+        n_bins = int(np.ceil(np.log2(n_points))) + 1
+    n_bins = min(max(n_bins, 1), max_bins)
+    return np.linspace(lower_limit, upper_limit, n_bins + 1)
+
+
+def compute_uniform_bin_indices(values, bins):
+    """Find the bin of each value for uniformly spaced bin edges.
+
+    Args:
+        values: array-like, shape (n, ) input data.
+        bins: array-like, shape (m + 1, ) uniformly spaced bin edges.
+
+    Returns:
+        An integer array of shape (n, ) of bin indices from 0 to m - 1.
+    """
+    n_bins = len(bins) - 1
+    bin_indices = np.subtract(values, bins[0], dtype=float)
+    bin_indices *= n_bins / (bins[-1] - bins[0])
+    np.clip(bin_indices, 0, n_bins - 1, out=bin_indices)
+    return bin_indices.astype(np.intp)
@@ -0,0 +1,103 @@
+"""Chooses between LaTeX and mathtext for rendering figure labels.
+
+Labels rendered with usetex shell out to latex and dvipng the first time each
+string is drawn. Matplotlib keeps their output in a content-addressed cache,
+the tex.cache directory under matplotlib.get_cachedir(), which is shared by
+every process and session using the same cache directory. Mathtext renders
+in process, needs no TeX install, and handles most of the labels used in
+these notes. The text renderers are:
+
+- "usetex": render with LaTeX, falling back to mathtext without a TeX install.
+- "mathtext": always render with mathtext.
+- "auto": render with mathtext, and with LaTeX only when mathtext cannot
+  parse the label.
+
+This module does not import matplotlib until a label is resolved.
+"""
+
+import shutil
+from functools import lru_cache
+
+TEXT_RENDERERS = ("usetex", "mathtext", "auto")
+
+_MATHTEXT_SUPPORT_CACHE_SIZE = 256
+
+_mathtext_parser = None
+_tex_available = None
+
+
+def is_tex_available():
+    """Check whether the latex and dvipng programs usetex needs are installed.
+
+    Returns:
+        bool
+    """
+    global _tex_available
+    if _tex_available is None:
+        _tex_available = all(
+            shutil.which(program) is not None
+            for program in ("latex", "dvipng")
+        )
+    return _tex_available
+
+
+@lru_cache(maxsize=_MATHTEXT_SUPPORT_CACHE_SIZE)
+def can_render_with_mathtext(text):
+    """Check whether mathtext can render a label.
+
+    Results are kept in a least recently used cache keyed on the label text.
+
+    Args:
+        text: the label text, with math delimited by dollar signs.
+
+    Returns:
+        bool
+    """
+    global _mathtext_parser
+    from matplotlib.cbook import is_math_text
+    from matplotlib.mathtext import MathTextParser
+
+    supported = True
+    if is_math_text(text):
+        if _mathtext_parser is None:
+            _mathtext_parser = MathTextParser("path")
+        try:
+            _mathtext_parser.parse(text)
+        except ValueError:
+            supported = False
+    return supported
+
+
+def resolve_usetex(text, text_renderer="usetex"):
+    """Decide whether a label should be rendered with LaTeX.
+
+    Args:
+        text: the label text.
+        text_renderer: one of TEXT_RENDERERS.
+
+    Returns:
+        The value to pass as the usetex property of the label.
+    """
+    if text_renderer not in TEXT_RENDERERS:
+        raise ValueError(f"Unknown text renderer: {text_renderer}")
+    if text_renderer == "mathtext" or not is_tex_available():
+        return False
+    if text_renderer == "auto":
+        return not can_render_with_mathtext(text)
+    return True
+
+
+def apply_text_renderer(text_artists, text_renderer="usetex"):
+    """Set the usetex property of labels according to a text renderer.
+
+    Args:
+        text_artists: iterable of matplotlib.text.Text labels.
+        text_renderer: one of TEXT_RENDERERS.
+
+    Returns:
+        None
+    """
+    for text_artist in text_artists:
+        text_artist.set_usetex(
+            resolve_usetex(text_artist.get_text(), text_renderer)
+        )
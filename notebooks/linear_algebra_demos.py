@@ -1,17 +1,28 @@
-import matplotlib.pyplot as plt
 import numpy as np
-from matplotlib.widgets import Slider
-
-
-def compute_norm(x_component, y_component):
-    """Compute the L2 norm of a 2-element vector."""
-    return np.sqrt(x_component**2 + y_component**2)
+from blit_manager import BlitManager, get_slider_artists
+from interaction_profiler import measure_phase
+from label_rendering import apply_text_renderer
+from linear_algebra_models import (  # noqa: F401
+    LPNormSurfaceEngine,
+    _extract_cell_corners,
+    _march_squares,
+    compute_contour_segments,
+    compute_lp_norm,
+    compute_lp_norms,
+    compute_norm,
+    raise_to_zero_power,
+)
 
 
 class L2NormDemo:
     """Demonstrate computing the L2 norm of a 2-element vector."""
 
-    def __init__(self):
+    def __init__(
+        self, use_blit=False, latency_recorder=None, text_renderer="usetex"
+    ):
+        self.use_blit = use_blit
+        self.latency_recorder = latency_recorder
+        self.text_renderer = text_renderer
         self._label_x_location = 7
         self._label_y_location = 9.5
         self._initial_x = 3.0
@@ -23,19 +34,42 @@ def __init__(self):
 
     def instantiate_plot(self):
         """Creates a plot to demonstrate the L2 norm."""
+        import matplotlib.pyplot as plt
+
         self._create_plot()
+        if self.latency_recorder is not None:
+            self.latency_recorder.instrument_canvas(self.fig.canvas)
         self._configure_plot_axes()
         self._plot_initial_vector()
         self._build_sliders()
         self._slider_x.on_changed(self._update)
         self._slider_y.on_changed(self._update)
+        self._build_blit_manager()
         plt.show()
 
+    def _build_blit_manager(self):
+        self._blit_manager = None
+        if not self.use_blit:
+            return
+        self._slider_x.drawon = False
+        self._slider_y.drawon = False
+        self._blit_manager = BlitManager(
+            self.fig.canvas,
+            [
+                self._vector_arrow,
+                self._vector_length_text,
+                *get_slider_artists(self._slider_x),
+                *get_slider_artists(self._slider_y),
+            ],
+        )
+
     def _build_display_text(self, norm):
         display_text_string = f"$\\|\\boldsymbol{{x}}\\|$ = {norm:.2f}"
         return display_text_string
 
     def _create_plot(self):
+        import matplotlib.pyplot as plt
+
         self.fig, self.ax = plt.subplots(figsize=(8, 6))
         plt.subplots_adjust(left=0.1, bottom=0.3)
 
@@ -44,9 +78,13 @@ def _configure_plot_axes(self):
         self.ax.set_ylim([self._plot_min, self._plot_max])
         self.ax.axhline(self._ORIGIN_X, color="black", lw=2)
         self.ax.axvline(self._ORIGIN_Y, color="black", lw=2)
-        self.ax.set_title("$L^2$ Norm Demonstration", usetex=True)
-        self.ax.set_xlabel("$x_1$", usetex=True)
-        self.ax.set_ylabel("$x_2$", usetex=True)
+        self.ax.set_title("$L^2$ Norm Demonstration")
+        self.ax.set_xlabel("$x_1$")
+        self.ax.set_ylabel("$x_2$")
+        apply_text_renderer(
+            [self.ax.title, self.ax.xaxis.label, self.ax.yaxis.label],
+            self.text_renderer,
+        )
         xtick_labels = self.ax.get_xticklabels()
         ytick_labels = self.ax.get_yticklabels()
         tick_labels = xtick_labels + ytick_labels
@@ -56,7 +94,7 @@ def _configure_plot_axes(self):
             label.usetex = True
 
     def _plot_initial_vector(self):
-        self.ax.arrow(
+        self._vector_arrow = self.ax.arrow(
             self._ORIGIN_X,
             self._ORIGIN_Y,
             self._initial_x,
@@ -77,6 +115,9 @@ def _plot_initial_vector(self):
         )
 
     def _build_sliders(self):
+        import matplotlib.pyplot as plt
+        from matplotlib.widgets import Slider
+
         x_slider_position = [0.1, 0.15, 0.8, 0.05]
         y_slider_position = [0.1, 0.05, 0.8, 0.05]
         ax_x = plt.axes(x_slider_position, facecolor="lightgoldenrodyellow")
@@ -89,50 +130,213 @@ def _build_sliders(self):
         )
 
     def _update(self, val):
-        new_x = self._slider_x.val
-        new_y = self._slider_y.val
-        [p.remove() for p in reversed(self.ax.patches)]
-        self.ax.arrow(
-            0,
-            0,
-            new_x,
-            new_y,
-            head_width=0.5,
-            head_length=0.7,
-            fc="black",
-            ec="black",
+        with measure_phase(self.latency_recorder, "update"):
+            with measure_phase(self.latency_recorder, "numeric"):
+                new_x = self._slider_x.val
+                new_y = self._slider_y.val
+                norm = compute_norm(new_x, new_y)
+                display_text = self._build_display_text(norm)
+            with measure_phase(self.latency_recorder, "artists"):
+                self._vector_arrow.set_data(dx=new_x, dy=new_y)
+                self._vector_length_text.set_text(display_text)
+            if self._blit_manager is not None:
+                with measure_phase(self.latency_recorder, "draw"):
+                    self._blit_manager.update()
+            else:
+                self.fig.canvas.draw_idle()
+
+
+# Font size of the contour labels, in points, and the fraction of the axes
+# range that labels are kept away from the axes edges.
+_LABEL_FONT_SIZE = 8
+_LABEL_MARGIN = 0.05
+
+
+class IncrementalContours:
+    """Draw contour lines that are updated in place when the surface changes.
+
+    All levels are drawn by a single Line2D whose data is replaced on update,
+    instead of removing and rebuilding a matplotlib ContourSet. Labels
+    are placed once per level along the diagonal of the axes, skipping any
+    that would overlap, and can be updated on every change, only after
+    changes stop for label_debounce_ms, or never. on_labels_changed, if
+    given, is called after debounced labels are updated and before the
+    canvas is redrawn, e.g. to mark new labels as animated for blitting.
+    """
+
+    def __init__(
+        self,
+        ax,
+        x_component,
+        y_component,
+        contour_levels=10,
+        label_mode="debounced",
+        label_debounce_ms=250,
+        fmt="%1.1f",
+        on_labels_changed=None,
+    ):
+        if label_mode not in ("always", "debounced", "never"):
+            raise ValueError(f"Unknown label mode: {label_mode}")
+        self.ax = ax
+        self.contour_levels = contour_levels
+        self.label_mode = label_mode
+        self.fmt = fmt
+        self.on_labels_changed = on_labels_changed
+        self._corner_x = _extract_cell_corners(x_component)
+        self._corner_y = _extract_cell_corners(y_component)
+        (self._contour_lines,) = ax.plot(
+            [], [], color="black", linewidth=1, scalex=False, scaley=False
         )
-        norm = compute_norm(new_x, new_y)
-        display_text = self._build_display_text(norm)
-        self._vector_length_text.set_text(display_text)
-        self.fig.canvas.draw_idle()
+        self._labels = []
+        self._level_segments = []
+        self._label_timer = None
+        if label_mode == "debounced":
+            self._label_timer = ax.figure.canvas.new_timer(
+                interval=label_debounce_ms
+            )
+            self._label_timer.single_shot = True
+            self._label_timer.add_callback(self._update_labels_and_draw)
+
+    def _compute_levels(self, surface):
+        from matplotlib.ticker import MaxNLocator
 
+        if np.iterable(self.contour_levels):
+            return np.asarray(self.contour_levels)
+        surface_min = np.min(surface)
+        surface_max = np.max(surface)
+        levels = MaxNLocator(self.contour_levels + 1).tick_values(
+            surface_min, surface_max
+        )
+        return levels[(levels > surface_min) & (levels < surface_max)]
 
-def raise_to_zero_power(x_variable):
-    """Raise to the power of 0, defining 0**0 = 0"""
-    x_equals_0_mask = x_variable == 0
-    x_variable[~x_equals_0_mask] = 1
-    return x_variable
+    def update(self, surface, final=True):
+        """Recompute the level sets of a new surface and update the lines.
 
+        Args:
+            surface: array-like, shape (ny, nx), the new surface values.
+            final: whether the change is complete. Debounced labels are only
+                updated once changes stop.
 
-def compute_lp_norm(x_component, y_component, p_parameter):
-    """Compute the LP norm of a 2-element vector."""
-    if p_parameter >= 1:
-        lp_norm = (
-            np.abs(x_component) ** p_parameter
-            + np.abs(y_component) ** p_parameter
-        ) ** (1 / p_parameter)
-    elif p_parameter < 1 and p_parameter > 0:
-        lp_norm = (
-            np.abs(x_component) ** p_parameter
-            + np.abs(y_component) ** p_parameter
+        Returns:
+            None
+        """
+        self.levels = self._compute_levels(surface)
+        corner_values = _extract_cell_corners(surface)
+        self._level_segments = [
+            _march_squares(
+                self._corner_x, self._corner_y, corner_values, level
+            )
+            for level in self.levels
+        ]
+        self._contour_lines.set_data(
+            *self._join_segments(self._level_segments).T
         )
-    elif p_parameter == 0:
-        abs_x_raised_to_zero_power = raise_to_zero_power(np.abs(x_component))
-        abs_y_raised_to_zero_power = raise_to_zero_power(np.abs(y_component))
-        lp_norm = abs_x_raised_to_zero_power + abs_y_raised_to_zero_power
 
-    return lp_norm
+        if self.label_mode == "always" or (
+            self.label_mode == "debounced" and final
+        ):
+            self._update_labels()
+        elif self.label_mode == "debounced":
+            for label in self._labels:
+                label.set_visible(False)
+            self._label_timer.stop()
+            self._label_timer.start()
+
+    @property
+    def artists(self):
+        """The artists that change when the contours are updated."""
+        return [self._contour_lines, *self._labels]
+
+    @staticmethod
+    def _join_segments(level_segments):
+        # Separate the segments with NaN points so every level set is drawn as
+        # a single path by one Line2D.
+        segments = np.concatenate([np.empty((0, 2, 2)), *level_segments])
+        points = np.full((segments.shape[0], 3, 2), np.nan)
+        points[:, :2] = segments
+        return points.reshape(-1, 2)
+
+    def _find_label_position(self, segments):
+        # Place the label where the level set first crosses the ray from the
+        # center of the axes to their top right corner, so labels of nested
+        # level sets are spread along the diagonal. Only segments inset from
+        # the axes limits are considered, so labels are not clipped, and a
+        # level set that never crosses the ray is labeled at its middle
+        # segment.
+        x_min, x_max = sorted(self.ax.get_xlim())
+        y_min, y_max = sorted(self.ax.get_ylim())
+        x_margin = _LABEL_MARGIN * (x_max - x_min)
+        y_margin = _LABEL_MARGIN * (y_max - y_min)
+        midpoints = segments.mean(axis=1)
+        inside = (
+            (midpoints[:, 0] >= x_min + x_margin)
+            & (midpoints[:, 0] <= x_max - x_margin)
+            & (midpoints[:, 1] >= y_min + y_margin)
+            & (midpoints[:, 1] <= y_max - y_margin)
+        )
+        segments = segments[inside]
+        midpoints = midpoints[inside]
+        if segments.shape[0] == 0:
+            return None
+        center = np.array([(x_min + x_max) / 2, (y_min + y_max) / 2])
+        direction = np.array([x_max, y_max]) - center
+        offsets = segments - center
+        side = direction[0] * offsets[..., 1] - direction[1] * offsets[..., 0]
+        crosses = (side[:, 0] * side[:, 1] <= 0) & (side[:, 0] != side[:, 1])
+        segments = segments[crosses]
+        side = side[crosses]
+        fraction = side[:, 0] / (side[:, 0] - side[:, 1])
+        crossings = segments[:, 0] + fraction[:, np.newaxis] * (
+            segments[:, 1] - segments[:, 0]
+        )
+        distances = (crossings - center) @ direction
+        on_ray = distances >= 0
+        if not np.any(on_ray):
+            return midpoints[midpoints.shape[0] // 2]
+        return crossings[on_ray][np.argmin(distances[on_ray])]
+
+    def _update_labels(self):
+        while len(self._labels) < len(self.levels):
+            self._labels.append(
+                self.ax.text(
+                    0,
+                    0,
+                    "",
+                    fontsize=_LABEL_FONT_SIZE,
+                    ha="center",
+                    va="center",
+                    bbox=dict(facecolor="white", edgecolor="none", pad=0),
+                )
+            )
+        for label in self._labels[len(self.levels) :]:
+            label.set_visible(False)
+        # Labels are placed from the outermost level set inwards, and a label
+        # too close to one already placed is hidden instead of overlapping it.
+        min_spacing = 2 * _LABEL_FONT_SIZE * self.ax.figure.dpi / 72
+        placed = np.empty((0, 2))
+        for i_label in reversed(range(len(self.levels))):
+            label = self._labels[i_label]
+            position = self._find_label_position(self._level_segments[i_label])
+            if position is not None:
+                display_position = self.ax.transData.transform(position)
+                if np.any(
+                    np.max(np.abs(placed - display_position), axis=1)
+                    < min_spacing
+                ):
+                    position = None
+            if position is None:
+                label.set_visible(False)
+                continue
+            placed = np.vstack((placed, display_position))
+            label.set_position(position)
+            label.set_text(self.fmt % self.levels[i_label])
+            label.set_visible(True)
+
+    def _update_labels_and_draw(self):
+        self._update_labels()
+        if self.on_labels_changed is not None:
+            self.on_labels_changed()
+        self.ax.figure.canvas.draw_idle()
 
 
 class LPNormDemo:
@@ -148,6 +352,12 @@ def __init__(
         n_max=10,
         cmap="viridis",
         contour_levels=10,
+        warm_cache=False,
+        contour_mode="matplotlib",
+        label_mode="debounced",
+        use_blit=False,
+        latency_recorder=None,
+        text_renderer="usetex",
     ):
         self.x_range = x_range
         self.y_range = y_range
@@ -157,19 +367,59 @@ def __init__(
         self.n_max = n_max
         self.cmap_name = cmap
         self.contour_levels = contour_levels
+        self.warm_cache = warm_cache
+        if contour_mode not in ("matplotlib", "incremental"):
+            raise ValueError(f"Unknown contour mode: {contour_mode}")
+        self.contour_mode = contour_mode
+        self.label_mode = label_mode
+        self.use_blit = use_blit
+        self.latency_recorder = latency_recorder
+        self.text_renderer = text_renderer
 
     def instantiate_plot(self):
         """Creates a plot to demonstrate the LP norm."""
+        import matplotlib.pyplot as plt
+
         self._create_surface()
         self._create_plot()
+        if self.latency_recorder is not None:
+            self.latency_recorder.instrument_canvas(self.fig.canvas)
         self._plot_initial_surface()
         self._create_colorbar()
         self._configure_plot_axes()
         self._build_slider()
         self.slider.on_changed(self._update)
+        self._build_blit_manager()
         plt.show()
 
+    def _build_blit_manager(self):
+        self._blit_manager = None
+        if not self.use_blit:
+            return
+        self.slider.drawon = False
+        self._blit_manager = BlitManager(
+            self.fig.canvas, self._get_animated_artists()
+        )
+
+    def _update_animated_artists(self):
+        if self._blit_manager is not None:
+            self._blit_manager.set_artists(self._get_animated_artists())
+
+    def _get_animated_artists(self):
+        if self.contour_mode == "incremental":
+            contour_artists = self.contours.artists
+        else:
+            contour_artists = [self.contours, *self.contours.labelTexts]
+        return [
+            self.cmap,
+            *contour_artists,
+            *get_slider_artists(self.slider),
+        ]
+
     def _build_slider(self):
+        import matplotlib.pyplot as plt
+        from matplotlib.widgets import Slider
+
         self.ax_slider = plt.axes(
             [0.1, 0.05, 0.8, 0.05], facecolor="lightgray"
         )
@@ -183,8 +433,9 @@ def _build_slider(self):
         )
 
     def _create_colorbar(self):
-        self.cbar = plt.colorbar(self.cmap, ax=self.ax)
-        self.cbar.set_label(r"$L^P$ Norm", usetex=True)
+        self.cbar = self.fig.colorbar(self.cmap, ax=self.ax)
+        self.cbar.set_label(r"$L^P$ Norm")
+        apply_text_renderer([self.cbar.ax.yaxis.label], self.text_renderer)
 
     def _plot_initial_surface(self):
         self.cmap = self.ax.imshow(
@@ -193,6 +444,12 @@ def _plot_initial_surface(self):
             origin="lower",
             cmap=self.cmap_name,
         )
+        self._draw_contours()
+
+    def _draw_contours(self):
+        if self.contour_mode == "incremental":
+            self.contours.update(self.p_norm)
+            return
         self.contours = self.ax.contour(
             self.x_component,
             self.y_component,
@@ -204,9 +461,13 @@ def _plot_initial_surface(self):
         self.ax.clabel(self.contours, inline=True, fontsize=8, fmt="%1.1f")
 
     def _configure_plot_axes(self):
-        self.ax.set_xlabel(r"$x_1$", usetex=True)
-        self.ax.set_ylabel(r"$x_2$", usetex=True)
-        self.ax.set_title(r"$L^P$ Norm Demonstration", usetex=True)
+        self.ax.set_xlabel(r"$x_1$")
+        self.ax.set_ylabel(r"$x_2$")
+        self.ax.set_title(r"$L^P$ Norm Demonstration")
+        apply_text_renderer(
+            [self.ax.xaxis.label, self.ax.yaxis.label, self.ax.title],
+            self.text_renderer,
+        )
         xtick_labels = self.ax.get_xticklabels()
         ytick_labels = self.ax.get_yticklabels()
         cbar_labels = self.cbar.ax.get_yticklabels()
@@ -217,33 +478,48 @@ def _configure_plot_axes(self):
             label.usetex = True
 
     def _create_plot(self):
+        import matplotlib.pyplot as plt
+
         self.fig, self.ax = plt.subplots()
         plt.subplots_adjust(left=0.1, bottom=0.25)
+        if self.contour_mode == "incremental":
+            self.contours = IncrementalContours(
+                self.ax,
+                self.x_component,
+                self.y_component,
+                contour_levels=self.contour_levels,
+                label_mode=self.label_mode,
+                on_labels_changed=self._update_animated_artists,
+            )
 
     def _create_surface(self):
         self.x_component, self.y_component = np.meshgrid(
             np.linspace(*self.x_range, self.grid_size),
             np.linspace(*self.y_range, self.grid_size),
         )
-        self.p_norm = compute_lp_norm(
-            self.x_component, self.y_component, self.n_init
+        self._surface_engine = LPNormSurfaceEngine(
+            self.x_component, self.y_component
         )
+        if self.warm_cache:
+            self._surface_engine.warm_cache(self.n_min, self.n_max)
+        self.p_norm = self._surface_engine.compute_surface(self.n_init)
 
     def _update(self, val):
-        p_parameter = self.slider.val
-        self.p_norm = compute_lp_norm(
-            self.x_component, self.y_component, p_parameter
-        )
-        self.cmap.set_data(self.p_norm)
-        self.cbar.update_normal(self.cmap)
-        self.contours.remove()
-        self.contours = self.ax.contour(
-            self.x_component,
-            self.y_component,
-            self.p_norm,
-            levels=self.contour_levels,
-            colors="black",
-            linewidths=1,
-        )
-        self.ax.clabel(self.contours, inline=True, fontsize=8, fmt="%1.1f")
-        self.fig.canvas.draw_idle()
+        with measure_phase(self.latency_recorder, "update"):
+            with measure_phase(self.latency_recorder, "numeric"):
+                p_parameter = self.slider.val
+                self.p_norm = self._surface_engine.compute_surface(p_parameter)
+            with measure_phase(self.latency_recorder, "artists"):
+                self.cmap.set_data(self.p_norm)
+                self.cbar.update_normal(self.cmap)
+                if self.contour_mode == "incremental":
+                    self.contours.update(self.p_norm, final=False)
+                else:
+                    self.contours.remove()
+                    self._draw_contours()
+            if self._blit_manager is not None:
+                self._update_animated_artists()
+                with measure_phase(self.latency_recorder, "draw"):
+                    self._blit_manager.update()
+            else:
+                self.fig.canvas.draw_idle()
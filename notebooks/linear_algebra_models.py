@@ -0,0 +1,265 @@
+"""Provides the numeric norm and contour models for the linear algebra demos.
+
+The sliders and figures built on these models live in linear_algebra_demos.
+"""
+
+import threading
+
+import numpy as np
+from caching import LRUCache
+
+
+def compute_norm(x_component, y_component):
+    """Compute the L2 norm of a 2-element vector."""
+    return np.sqrt(x_component**2 + y_component**2)
+
+
+def raise_to_zero_power(x_variable):
+    """Raise to the power of 0, defining 0**0 = 0"""
+    return np.asarray(x_variable != 0, dtype=np.result_type(x_variable))
+
+
+def compute_lp_norm(x_component, y_component, p_parameter):
+    """Compute the LP norm of a 2-element vector."""
+    if p_parameter >= 1:
+        lp_norm = (
+            np.abs(x_component) ** p_parameter
+            + np.abs(y_component) ** p_parameter
+        ) ** (1 / p_parameter)
+    elif p_parameter < 1 and p_parameter > 0:
+        lp_norm = (
+            np.abs(x_component) ** p_parameter
+            + np.abs(y_component) ** p_parameter
+        )
+    elif p_parameter == 0:
+        abs_x_raised_to_zero_power = raise_to_zero_power(np.abs(x_component))
+        abs_y_raised_to_zero_power = raise_to_zero_power(np.abs(y_component))
+        lp_norm = abs_x_raised_to_zero_power + abs_y_raised_to_zero_power
+
+    return lp_norm
+
+
+def compute_lp_norms(vectors, p_parameter, axis=-1, out=None, dtype=None):
+    """Compute the LP norms of a batch of vectors.
+
+    Uses the same conventions as compute_lp_norm: for 0 < p < 1 the sum of the
+    powers is returned without taking the root, and for p = 0 the number of
+    non-zero components is returned. The input is never modified.
+
+    Args:
+        vectors: array-like, shape (..., d), the vectors to take norms of.
+        p_parameter: the value of p, a non-negative number or np.inf.
+        axis: the axis holding the vector components.
+        out: optional array, shape (...), to write the norms into.
+        dtype: optional floating point dtype for the computation, e.g.
+            np.float32. By default floating point input keeps its dtype and
+            integer or boolean input is computed in float64.
+
+    Returns:
+        The array of norms with the component axis removed.
+    """
+    if p_parameter < 0:
+        raise ValueError("p_parameter must be non-negative")
+    vectors = np.asarray(vectors)
+    if dtype is None:
+        dtype = vectors.dtype
+        if not np.issubdtype(dtype, np.floating):
+            dtype = np.result_type(dtype, np.float64)
+    if p_parameter == 0:
+        return np.sum(vectors != 0, axis=axis, dtype=dtype, out=out)
+    abs_vectors = np.abs(vectors, dtype=dtype)
+    if p_parameter == np.inf:
+        return np.max(abs_vectors, axis=axis, out=out)
+    if p_parameter == 2:
+        np.square(abs_vectors, out=abs_vectors)
+    elif p_parameter != 1:
+        np.power(abs_vectors, p_parameter, out=abs_vectors)
+    lp_norms = np.sum(abs_vectors, axis=axis, out=out)
+    if p_parameter > 1:
+        lp_norms = np.power(lp_norms, 1 / p_parameter, out=lp_norms)
+    return lp_norms
+
+
+class LPNormSurfaceEngine:
+    """Evaluate and cache LP norm surfaces over a fixed grid.
+
+    The logarithms of the absolute grid components are computed once, so the
+    surface for any p costs a few vector operations. Surfaces for p on the
+    slider grid are kept in a least recently used cache holding at most
+    cache_bytes of surfaces. Any other p is evaluated exactly and not cached.
+    """
+
+    def __init__(
+        self,
+        x_component,
+        y_component,
+        cache_bytes=64 * 2**20,
+        p_resolution=0.1,
+    ):
+        self.x_component = x_component
+        self.y_component = y_component
+        self.cache_bytes = cache_bytes
+        self.p_resolution = p_resolution
+        surface_bytes = np.broadcast(x_component, y_component).size * 8
+        self.cache_size = max(1, cache_bytes // surface_bytes)
+        with np.errstate(divide="ignore"):
+            self._log_abs_x = np.log(np.abs(x_component))
+            self._log_abs_y = np.log(np.abs(y_component))
+        self._x_is_nonzero = x_component != 0
+        self._y_is_nonzero = y_component != 0
+        self._surfaces: LRUCache[int, np.ndarray] = LRUCache(self.cache_size)
+        self._lock = threading.Lock()
+        self._warming_thread = None
+
+    def _quantize(self, p_parameter):
+        return round(p_parameter / self.p_resolution)
+
+    def _evaluate(self, p_parameter):
+        if p_parameter == 0:
+            return self._x_is_nonzero.astype(float) + self._y_is_nonzero
+        lp_sum = np.exp(p_parameter * self._log_abs_x)
+        lp_sum += np.exp(p_parameter * self._log_abs_y)
+        if p_parameter >= 1:
+            lp_sum **= 1 / p_parameter
+        return lp_sum
+
+    def compute_surface(self, p_parameter):
+        """Return the LP norm surface for p, computing it if not cached.
+
+        The returned array may be shared with the cache and is read-only.
+        """
+        key = self._quantize(p_parameter)
+        if not np.isclose(
+            p_parameter, key * self.p_resolution, rtol=1e-9, atol=1e-12
+        ):
+            surface = self._evaluate(p_parameter)
+            surface.setflags(write=False)
+            return surface
+        with self._lock:
+            cached_surface = self._surfaces.get(key)
+        if cached_surface is not None:
+            return cached_surface
+        surface = self._evaluate(key * self.p_resolution)
+        surface.setflags(write=False)
+        with self._lock:
+            self._surfaces.put(key, surface)
+        return surface
+
+    def warm_cache(self, p_min, p_max, background=True):
+        """Precompute surfaces for every p step from p_min to p_max."""
+        n_steps = self._quantize(p_max) - self._quantize(p_min) + 1
+        p_values = p_min + self.p_resolution * np.arange(n_steps)
+
+        def compute_all_surfaces():
+            for p_parameter in p_values:
+                self.compute_surface(p_parameter)
+
+        if not background:
+            compute_all_surfaces()
+            return
+        self._warming_thread = threading.Thread(
+            target=compute_all_surfaces, daemon=True
+        )
+        self._warming_thread.start()
+
+
+# Marching squares edge pairs for each cell case. Bit i of a case is set when
+# corner i (bottom-left, bottom-right, top-right, top-left) is above the
+# level. Edges are numbered bottom, right, top, left, and -1 marks no segment.
+_MARCHING_SQUARES_SEGMENTS = np.array(
+    [
+        [[-1, -1], [-1, -1]],
+        [[3, 0], [-1, -1]],
+        [[0, 1], [-1, -1]],
+        [[3, 1], [-1, -1]],
+        [[1, 2], [-1, -1]],
+        [[3, 0], [1, 2]],
+        [[0, 2], [-1, -1]],
+        [[3, 2], [-1, -1]],
+        [[2, 3], [-1, -1]],
+        [[0, 2], [-1, -1]],
+        [[0, 1], [2, 3]],
+        [[1, 2], [-1, -1]],
+        [[1, 3], [-1, -1]],
+        [[0, 1], [-1, -1]],
+        [[3, 0], [-1, -1]],
+        [[-1, -1], [-1, -1]],
+    ]
+)
+
+
+_CELL_CORNER_SLICES = [
+    (slice(None, -1), slice(None, -1)),
+    (slice(None, -1), slice(1, None)),
+    (slice(1, None), slice(1, None)),
+    (slice(1, None), slice(None, -1)),
+]
+
+_CELL_EDGE_CORNERS = [(0, 1), (1, 2), (3, 2), (0, 3)]
+
+
+def _extract_cell_corners(grid_array):
+    return [grid_array[corner].ravel() for corner in _CELL_CORNER_SLICES]
+
+
+def _march_squares(corner_x, corner_y, corner_values, level):
+    cell_case = (corner_values[0] > level).astype(np.uint8)
+    for bit in range(1, 4):
+        cell_case |= (corner_values[bit] > level).astype(np.uint8) << bit
+    active_cells = np.flatnonzero((cell_case != 0) & (cell_case != 15))
+    cell_case = cell_case[active_cells]
+    active_x = [x_corner[active_cells] for x_corner in corner_x]
+    active_y = [y_corner[active_cells] for y_corner in corner_y]
+    active_values = [values[active_cells] for values in corner_values]
+
+    edge_points = np.empty((4, active_cells.shape[0], 2))
+    for edge, (start, end) in enumerate(_CELL_EDGE_CORNERS):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            fraction = (level - active_values[start]) / (
+                active_values[end] - active_values[start]
+            )
+        fraction = np.nan_to_num(fraction, nan=0.5)
+        edge_points[edge, :, 0] = active_x[start] + fraction * (
+            active_x[end] - active_x[start]
+        )
+        edge_points[edge, :, 1] = active_y[start] + fraction * (
+            active_y[end] - active_y[start]
+        )
+
+    segments = []
+    cell_indices = np.arange(active_cells.shape[0])
+    for segment_slot in range(2):
+        edge_pairs = _MARCHING_SQUARES_SEGMENTS[cell_case, segment_slot]
+        has_segment = edge_pairs[:, 0] >= 0
+        edge_pairs = edge_pairs[has_segment]
+        slot_cells = cell_indices[has_segment]
+        segments.append(
+            np.stack(
+                (
+                    edge_points[edge_pairs[:, 0], slot_cells],
+                    edge_points[edge_pairs[:, 1], slot_cells],
+                ),
+                axis=1,
+            )
+        )
+    return np.concatenate(segments)
+
+
+def compute_contour_segments(x_component, y_component, surface, level):
+    """Compute the line segments of one level set with marching squares.
+
+    Args:
+        x_component: array-like, shape (ny, nx), the meshgrid x coordinates.
+        y_component: array-like, shape (ny, nx), the meshgrid y coordinates.
+        surface: array-like, shape (ny, nx), the surface values.
+        level: the surface value of the level set.
+
+    Returns:
+        An array of shape (n_segments, 2, 2) of segment end points.
+    """
+    return _march_squares(
+        _extract_cell_corners(x_component),
+        _extract_cell_corners(y_component),
+        _extract_cell_corners(surface),
+        level,
+    )
@@ -1,7 +1,26 @@
 """Defines educational tools for working with signals."""
 
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
 import numpy as np
 
+# The number of trials drawn from each spawned generator. It fixes how the
+# trials are split into independent blocks, so changing it changes the noise.
+TRIALS_PER_SEED = 16
+
+
+def compute_signal_power(signal_array: np.ndarray) -> float:
+    """Compute the average power of a signal.
+
+    Args:
+        signal_array: The signal whose power is to be computed.
+
+    Returns:
+        The mean squared magnitude of the signal.
+    """
+    return np.average(np.abs(signal_array) ** 2)
+
 
 def add_white_gaussian_noise(
     signal_array: np.ndarray, snr_db: float, rng: np.random.Generator
@@ -19,7 +38,7 @@ def add_white_gaussian_noise(
         The noisy signal as an array of the same shape as the original.
     """
     snr = 10 ** (snr_db / 10)
-    signal_power = np.average(np.abs(signal_array) ** 2)
+    signal_power = compute_signal_power(signal_array)
     noise_power = signal_power / snr
     mu_noise_mean = 0
     sigma_noise_std_dev = np.sqrt(noise_power)
@@ -28,6 +47,187 @@ def add_white_gaussian_noise(
     return signal_with_noise
 
 
+def _draw_noisy_trials(
+    signal_array: np.ndarray,
+    sigma_noise_std_dev: float,
+    n_trials: int,
+    seed_sequence: np.random.SeedSequence,
+    max_chunk_samples: int | None = None,
+    out: np.ndarray | None = None,
+) -> np.ndarray:
+    rng = np.random.default_rng(seed_sequence)
+    if out is None:
+        out = np.empty((n_trials, signal_array.shape[0]))
+    trials_per_chunk = n_trials
+    if max_chunk_samples is not None:
+        trials_per_chunk = max(1, max_chunk_samples // signal_array.shape[0])
+    # Consecutive draws from one generator form a single stream, so the chunk
+    # size does not change the noise realizations.
+    for start in range(0, n_trials, trials_per_chunk):
+        noise_chunk = out[start : start + trials_per_chunk]
+        rng.standard_normal(out=noise_chunk)
+        noise_chunk *= sigma_noise_std_dev
+        noise_chunk += signal_array
+    return out
+
+
+def _draw_noisy_trial_block(
+    out: np.ndarray,
+    i_snr: int,
+    trial_start: int,
+    signal_array: np.ndarray,
+    sigma_noise_std_dev: float,
+    seed_sequence: np.random.SeedSequence,
+    max_chunk_samples: int | None,
+) -> None:
+    trial_block = out[i_snr, trial_start : trial_start + TRIALS_PER_SEED]
+    _draw_noisy_trials(
+        signal_array,
+        sigma_noise_std_dev,
+        trial_block.shape[0],
+        seed_sequence,
+        max_chunk_samples,
+        trial_block,
+    )
+
+
+def _draw_noisy_trial_block_into_memmap(
+    filename: str, offset: int, shape: tuple[int, ...], *block_arguments
+) -> None:
+    # Workers attach to the parent's output instead of receiving or
+    # returning arrays, so no trial data goes through the pipe.
+    out = np.memmap(
+        filename, dtype=float, mode="r+", offset=offset, shape=shape
+    )
+    _draw_noisy_trial_block(out, *block_arguments)
+    out.flush()
+
+
+def _draw_noisy_trial_block_into_shared_memory(
+    name: str, shape: tuple[int, ...], *block_arguments
+) -> None:
+    shared_memory = SharedMemory(name=name)
+    out = np.ndarray(shape, buffer=shared_memory.buf)
+    _draw_noisy_trial_block(out, *block_arguments)
+    # Views of the shared buffer must be released before it can be closed.
+    del out
+    shared_memory.close()
+
+
+def add_white_gaussian_noise_trials(
+    signal_array: np.ndarray,
+    snr_db_values: np.ndarray,
+    n_trials: int,
+    seed: int | np.random.SeedSequence,
+    max_chunk_samples: int | None = None,
+    n_workers: int = 1,
+    out: np.ndarray | None = None,
+) -> np.ndarray:
+    """Draw many noisy realizations of a signal across a sweep of SNRs.
+
+    This is a batched version of add_white_gaussian_noise for Monte-Carlo
+    trials. The signal power is computed once, and every block of
+    TRIALS_PER_SEED trials of each SNR gets its own generator spawned from
+    the seed, so results are reproducible for a given seed regardless of
+    max_chunk_samples or n_workers. Workers write their blocks directly into
+    out when it is a file backed numpy.memmap, and into shared memory that
+    is copied into out once otherwise.
+
+    Args:
+        signal_array: array-like, shape (n, ), the real signal to add noise to.
+        snr_db_values: array-like, shape (n_snr, ), the SNRs in 10*log10 dB.
+        n_trials: The number of noisy realizations per SNR.
+        seed: The seed or SeedSequence from which generators are spawned.
+        max_chunk_samples: Optional cap on the number of samples drawn at once
+            by each worker.
+        n_workers: The number of processes to split the trial blocks across.
+        out: Optional float64 array, shape (n_snr, n_trials, n), e.g. a
+            numpy.memmap, to write the noisy signals into.
+
+    Returns:
+        The noisy signals as an array of shape (n_snr, n_trials, n).
+    """
+    signal_array = np.asarray(signal_array, dtype=float)
+    snr_db_values = np.atleast_1d(snr_db_values)
+    n_snr = snr_db_values.shape[0]
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    trial_starts = range(0, n_trials, TRIALS_PER_SEED)
+    block_seed_sequences = [
+        snr_seed_sequence.spawn(len(trial_starts))
+        for snr_seed_sequence in seed.spawn(n_snr)
+    ]
+    noise_power = compute_signal_power(signal_array) / 10 ** (
+        snr_db_values / 10
+    )
+    sigma_noise_std_devs = np.sqrt(noise_power)
+    shape = (n_snr, n_trials, signal_array.shape[0])
+    if out is None:
+        out = np.empty(shape)
+    block_arguments = [
+        (
+            i_snr,
+            trial_start,
+            signal_array,
+            sigma_noise_std_devs[i_snr],
+            block_seed_sequences[i_snr][i_block],
+            max_chunk_samples,
+        )
+        for i_snr in range(n_snr)
+        for i_block, trial_start in enumerate(trial_starts)
+    ]
+    if n_workers == 1:
+        for arguments in block_arguments:
+            _draw_noisy_trial_block(out, *arguments)
+        return out
+
+    if (
+        isinstance(out, np.memmap)
+        and out.filename is not None
+        and out.dtype == float
+        and out.flags.c_contiguous
+    ):
+        out.flush()
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            futures = [
+                executor.submit(
+                    _draw_noisy_trial_block_into_memmap,
+                    out.filename,
+                    out.offset,
+                    shape,
+                    *arguments,
+                )
+                for arguments in block_arguments
+            ]
+            for future in futures:
+                future.result()
+        return out
+
+    shared_memory = SharedMemory(
+        create=True, size=max(1, int(np.prod(shape)) * 8)
+    )
+    try:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            futures = [
+                executor.submit(
+                    _draw_noisy_trial_block_into_shared_memory,
+                    shared_memory.name,
+                    shape,
+                    *arguments,
+                )
+                for arguments in block_arguments
+            ]
+            for future in futures:
+                future.result()
+        shared_out = np.ndarray(shape, buffer=shared_memory.buf)
+        out[...] = shared_out
+        del shared_out
+    finally:
+        shared_memory.close()
+        shared_memory.unlink()
+    return out
+
+
 def generate_tone_signal(
     time_seconds,
     pulse_start_seconds,
@@ -39,3 +239,347 @@ def generate_tone_signal(
     ) - np.heaviside(time_seconds - pulse_end_seconds, 1)
     tone_signal = envelope * np.sin(2 * np.pi * frequency1_hz * time_seconds)
     return tone_signal
+
+
+_DIRECT_CORRELATION_MAX_TEMPLATE_LENGTH = 32
+_DIRECT_CORRELATION_MAX_OPERATIONS = 2**20
+
+
+def _next_power_of_two(n: int) -> int:
+    return 1 << max(n - 1, 0).bit_length()
+
+
+def choose_correlation_method(n_signal: int, n_template: int) -> str:
+    """Choose the cheapest way to cross-correlate a signal with a template.
+
+    Args:
+        n_signal: The number of samples in the signal.
+        n_template: The number of samples in the template.
+
+    Returns:
+        One of "direct", "fft" or "overlap_add".
+    """
+    if (
+        n_template <= _DIRECT_CORRELATION_MAX_TEMPLATE_LENGTH
+        or n_signal * n_template <= _DIRECT_CORRELATION_MAX_OPERATIONS
+    ):
+        return "direct"
+    if n_signal <= 16 * n_template:
+        return "fft"
+    return "overlap_add"
+
+
+def _correlate_fft(signal_array: np.ndarray, template: np.ndarray):
+    n_signal = signal_array.shape[-1]
+    n_template = template.shape[-1]
+    n_fft = _next_power_of_two(n_signal + n_template - 1)
+    signal_fft = np.fft.rfft(signal_array, n_fft)
+    template_fft = np.fft.rfft(template[..., ::-1], n_fft)
+    full_convolution = np.fft.irfft(signal_fft * template_fft, n_fft)
+    return full_convolution[..., n_template - 1 : n_signal]
+
+
+def _overlap_add_geometry(n_template: int) -> tuple[int, int]:
+    n_fft = _next_power_of_two(8 * n_template)
+    block_size = n_fft - n_template + 1
+    return n_fft, block_size
+
+
+def _compute_block_spectra(signal_array: np.ndarray, n_template: int):
+    n_signal = signal_array.shape[-1]
+    n_fft, block_size = _overlap_add_geometry(n_template)
+    n_blocks = -(-n_signal // block_size)
+    blocks = np.zeros((n_blocks, block_size))
+    blocks.reshape(-1)[:n_signal] = signal_array
+    return np.fft.rfft(blocks, n_fft, axis=1)
+
+
+def _overlap_add_from_block_spectra(
+    block_spectra: np.ndarray, template: np.ndarray, n_signal: int
+):
+    n_template = template.shape[-1]
+    n_fft, block_size = _overlap_add_geometry(n_template)
+    n_blocks = block_spectra.shape[0]
+    template_fft = np.fft.rfft(template[::-1], n_fft)
+    block_convolutions = np.fft.irfft(
+        block_spectra * template_fft, n_fft, axis=1
+    )
+    # Each block's tail of n_template - 1 samples spills into the next block.
+    full_convolution = np.zeros((n_blocks + 1) * block_size)
+    full_convolution[: n_blocks * block_size] = block_convolutions[
+        :, :block_size
+    ].reshape(-1)
+    spill_over = full_convolution[block_size:].reshape(n_blocks, block_size)
+    spill_over[:, : n_template - 1] += block_convolutions[
+        :, block_size : block_size + n_template - 1
+    ]
+    return full_convolution[n_template - 1 : n_signal]
+
+
+def _correlate_overlap_add(signal_array: np.ndarray, template: np.ndarray):
+    block_spectra = _compute_block_spectra(signal_array, template.shape[-1])
+    return _overlap_add_from_block_spectra(
+        block_spectra, template, signal_array.shape[-1]
+    )
+
+
+def correlate_valid(
+    signal_array: np.ndarray, template: np.ndarray, method: str = "auto"
+) -> np.ndarray:
+    """Cross-correlate a real signal with a real template.
+
+    The result matches np.correlate(signal_array, template, mode="valid"), but
+    long templates and long signals are handled with FFTs.
+
+    Args:
+        signal_array: array-like, shape (n, ), the signal to search.
+        template: array-like, shape (m, ), the template to search for.
+        method: "auto", "direct", "fft" or "overlap_add".
+
+    Returns:
+        The correlation as an array of shape (n - m + 1, ).
+    """
+    signal_array = np.asarray(signal_array, dtype=float)
+    template = np.asarray(template, dtype=float)
+    if template.shape[0] > signal_array.shape[0]:
+        raise ValueError("template must not be longer than the signal")
+    if method == "auto":
+        method = choose_correlation_method(
+            signal_array.shape[0], template.shape[0]
+        )
+    if method == "direct":
+        return np.correlate(signal_array, template, mode="valid")
+    if method == "fft":
+        return _correlate_fft(signal_array, template)
+    if method == "overlap_add":
+        return _correlate_overlap_add(signal_array, template)
+    raise ValueError(f"Unknown correlation method: {method}")
+
+
+def correlate_template_bank(
+    signal_array: np.ndarray, templates: np.ndarray, method: str = "auto"
+) -> np.ndarray:
+    """Cross-correlate a real signal with a bank of equal-length templates.
+
+    The signal is transformed once and the transform is reused for every
+    template, so the cost grows close to linearly with the number of
+    templates.
+
+    Args:
+        signal_array: array-like, shape (n, ), the signal to search.
+        templates: array-like, shape (k, m), one template per row.
+        method: "auto", "direct", "fft" or "overlap_add".
+
+    Returns:
+        The correlations as an array of shape (k, n - m + 1), where row i
+        matches correlate_valid(signal_array, templates[i]).
+    """
+    signal_array = np.asarray(signal_array, dtype=float)
+    templates = np.atleast_2d(np.asarray(templates, dtype=float))
+    n_signal = signal_array.shape[0]
+    n_template = templates.shape[1]
+    if n_template > n_signal:
+        raise ValueError("templates must not be longer than the signal")
+    if method == "auto":
+        method = choose_correlation_method(n_signal, n_template)
+    if method == "direct":
+        # The matrix product copies every signal window, so it is only used
+        # while that copy is small. Longer signals are correlated one
+        # template at a time, which needs no memory beyond the output.
+        if n_signal * n_template <= _DIRECT_CORRELATION_MAX_OPERATIONS:
+            signal_windows = np.lib.stride_tricks.sliding_window_view(
+                signal_array, n_template
+            )
+            return templates @ signal_windows.T
+        correlations = np.empty(
+            (templates.shape[0], n_signal - n_template + 1)
+        )
+        for template, correlation in zip(templates, correlations):
+            correlation[:] = np.correlate(signal_array, template, mode="valid")
+        return correlations
+    if method == "fft":
+        return _correlate_fft(signal_array, templates)
+    if method == "overlap_add":
+        block_spectra = _compute_block_spectra(signal_array, n_template)
+        correlations = np.empty(
+            (templates.shape[0], n_signal - n_template + 1)
+        )
+        for template, correlation in zip(templates, correlations):
+            correlation[:] = _overlap_add_from_block_spectra(
+                block_spectra, template, n_signal
+            )
+        return correlations
+    raise ValueError(f"Unknown correlation method: {method}")
+
+
+def find_threshold_crossings(
+    detection_output: np.ndarray, threshold: float, was_above: bool = False
+) -> np.ndarray:
+    """Find the indices where a detection output rises to a threshold.
+
+    Args:
+        detection_output: array-like, shape (n, ), the detector output.
+        threshold: The detection threshold.
+        was_above: Whether the sample before this array was at or above the
+            threshold, so crossings can be tracked across streamed blocks.
+
+    Returns:
+        The indices of the samples at which the threshold is crossed upwards.
+    """
+    above = detection_output >= threshold
+    previous_above = np.empty_like(above)
+    previous_above[:1] = was_above
+    previous_above[1:] = above[:-1]
+    return np.flatnonzero(above & ~previous_above)
+
+
+def matched_filter_detect(
+    signal_array: np.ndarray,
+    template: np.ndarray,
+    threshold: float,
+    method: str = "auto",
+) -> tuple[np.ndarray, np.ndarray]:
+    """Detect a template in a signal with a matched filter.
+
+    Args:
+        signal_array: array-like, shape (n, ), the signal to search.
+        template: array-like, shape (m, ), the template to search for.
+        threshold: The threshold applied to the squared detection output.
+        method: "auto", "direct", "fft" or "overlap_add".
+
+    Returns:
+        The squared detection output, shape (n - m + 1, ), and the indices at
+        which it crosses the threshold.
+    """
+    detection_output = correlate_valid(signal_array, template, method) ** 2
+    crossings = find_threshold_crossings(detection_output, threshold)
+    return detection_output, crossings
+
+
+class MatchedFilterDetector:
+    """Run a matched filter detector over a stream of signal blocks.
+
+    The last m - 1 samples of each block are carried over to the next one, so
+    the concatenated outputs equal a single matched_filter_detect call on the
+    whole signal.
+    """
+
+    def __init__(
+        self, template: np.ndarray, threshold: float, method: str = "auto"
+    ):
+        self.template = np.asarray(template, dtype=float)
+        self.threshold = threshold
+        self.method = method
+        self.reset()
+
+    def reset(self):
+        """Clear the carried-over state to start a new stream."""
+        self._overlap = np.empty(0)
+        self._n_output_samples = 0
+        self._was_above = False
+
+    def process_block(
+        self, signal_block: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Process the next block of the signal.
+
+        Args:
+            signal_block: array-like, shape (b, ), the next signal samples.
+
+        Returns:
+            The squared detection output for the samples that are now complete
+            and the stream-absolute indices of any threshold crossings.
+        """
+        n_template = self.template.shape[0]
+        extended_block = np.concatenate((self._overlap, signal_block))
+        self._overlap = extended_block[
+            max(extended_block.shape[0] - n_template + 1, 0) :
+        ]
+        if extended_block.shape[0] < n_template:
+            return np.empty(0), np.empty(0, dtype=np.intp)
+        detection_output = (
+            correlate_valid(extended_block, self.template, self.method) ** 2
+        )
+        crossings = (
+            find_threshold_crossings(
+                detection_output, self.threshold, self._was_above
+            )
+            + self._n_output_samples
+        )
+        self._n_output_samples += detection_output.shape[0]
+        self._was_above = bool(detection_output[-1] >= self.threshold)
+        return detection_output, crossings
+
+
+def _synthesize_tone_recursively(
+    time_seconds: np.ndarray, frequency_hz: float
+) -> np.ndarray:
+    # Rotate a block of phasors by one block-length step at a time, so only
+    # O(sqrt(n)) complex exponentials are evaluated for n uniform samples.
+    n_samples = time_seconds.shape[0]
+    sample_period = time_seconds[1] - time_seconds[0] if n_samples > 1 else 0
+    block_size = int(np.ceil(np.sqrt(n_samples)))
+    n_blocks = -(-n_samples // block_size)
+    omega = 2 * np.pi * frequency_hz
+    within_block_phasors = np.exp(
+        1j * omega * sample_period * np.arange(block_size)
+    )
+    block_start_phasors = np.exp(
+        1j
+        * omega
+        * (time_seconds[0] + sample_period * block_size * np.arange(n_blocks))
+    )
+    phasors = np.outer(block_start_phasors, within_block_phasors)
+    return phasors.imag.reshape(-1)[:n_samples]
+
+
+def generate_pulse_train(
+    time_seconds: np.ndarray,
+    pulse_start_seconds: np.ndarray,
+    pulse_end_seconds: np.ndarray,
+    frequencies_hz: np.ndarray,
+    use_recursive_oscillator: bool = False,
+    out: np.ndarray | None = None,
+) -> np.ndarray:
+    """Generate a signal made of many tone pulses.
+
+    Each pulse matches generate_tone_signal for the same start, end and
+    frequency, and overlapping pulses add. Only the samples inside each pulse
+    are computed, so sparse pulse trains cost little more than the zeros.
+
+    Args:
+        time_seconds: array-like, shape (n, ), sorted sample times.
+        pulse_start_seconds: array-like, shape (k, ), the pulse start times.
+        pulse_end_seconds: array-like, shape (k, ), the pulse end times.
+        frequencies_hz: array-like, shape (k, ), the pulse frequencies.
+        use_recursive_oscillator: If True, synthesize each tone by rotating
+            phasors instead of calling np.sin on every sample. This assumes
+            the samples are uniformly spaced.
+        out: Optional array, shape (n, ), e.g. a numpy.memmap, to write into.
+
+    Returns:
+        The pulse train as an array of shape (n, ).
+    """
+    if out is None:
+        out = np.zeros(time_seconds.shape[0])
+    else:
+        out[...] = 0
+    start_indices = np.searchsorted(time_seconds, pulse_start_seconds)
+    end_indices = np.searchsorted(time_seconds, pulse_end_seconds)
+    for start_index, end_index, frequency_hz in zip(
+        start_indices,
+        end_indices,
+        np.broadcast_to(frequencies_hz, len(start_indices)),
+    ):
+        if end_index <= start_index:
+            continue
+        pulse_time_seconds = time_seconds[start_index:end_index]
+        if use_recursive_oscillator:
+            out[start_index:end_index] += _synthesize_tone_recursively(
+                pulse_time_seconds, frequency_hz
+            )
+        else:
+            out[start_index:end_index] += np.sin(
+                2 * np.pi * frequency_hz * pulse_time_seconds
+            )
+    return out
@@ -1,6 +1,225 @@
 """Demonstrates linear and nonlinear spring models for student examples."""
 
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+from pathlib import Path
+
 import numpy as np
+from caching import LRUCache
+from scipy.linalg import solve_triangular
+
+_FITTER_CACHE_SIZE = 8
+# Bumped whenever the force models change, so surrogates fitted to the old
+# forces are not loaded from existing caches.
+_SURROGATE_CACHE_VERSION = 2
+_fitter_cache: LRUCache[tuple, "PolynomialFitter"] = LRUCache(
+    _FITTER_CACHE_SIZE
+)
+_default_surrogate_cache = None
+
+
+def _hash_grid(displacement_x):
+    return hashlib.sha256(displacement_x.tobytes()).hexdigest()
+
+
+def _map_to_window(displacement_x, domain):
+    domain_min, domain_max = domain
+    return (2 * np.asarray(displacement_x) - domain_min - domain_max) / (
+        domain_max - domain_min
+    )
+
+
+class PolynomialFitter:
+    """Fits least-squares polynomials on a fixed displacement grid.
+
+    The design matrix is built and QR factorized once, so each new set of
+    forces is fit with a single matrix product and a small triangular solve.
+    The monomial basis matches np.polyfit, with coefficients ordered from the
+    highest power. The Chebyshev basis maps the grid onto [-1, 1] and stays
+    well conditioned at high degree.
+    """
+
+    def __init__(self, displacement_x, degree, basis="monomial"):
+        displacement_x = np.asarray(displacement_x, dtype=float)
+        self.degree = degree
+        self.basis = basis
+        self.domain = (np.min(displacement_x), np.max(displacement_x))
+        if basis == "monomial":
+            design_matrix = np.vander(displacement_x, degree + 1)
+        elif basis == "chebyshev":
+            design_matrix = np.polynomial.chebyshev.chebvander(
+                self.map_to_window(displacement_x), degree
+            )
+        else:
+            raise ValueError(f"Unknown polynomial basis: {basis}")
+        # Scale the columns to unit norm, as np.polyfit does, to improve the
+        # conditioning of the factorization.
+        self._column_scale = np.linalg.norm(design_matrix, axis=0)
+        self._column_scale[self._column_scale == 0] = 1
+        self._q, self._r = np.linalg.qr(design_matrix / self._column_scale)
+
+    def map_to_window(self, displacement_x):
+        """Map displacements from the fitted domain onto [-1, 1]."""
+        return _map_to_window(displacement_x, self.domain)
+
+    def fit(self, spring_force_f):
+        """Fit coefficients to forces sampled on the displacement grid.
+
+        Args:
+            spring_force_f: array-like, shape (n, ) or (n, k), the forces. Each
+                column of a 2-D array is fit separately.
+
+        Returns:
+            The coefficients, shape (degree + 1, ) or (degree + 1, k).
+        """
+        projected_forces = self._q.T @ spring_force_f
+        coefficients = solve_triangular(self._r, projected_forces)
+        return (coefficients.T / self._column_scale).T
+
+    def evaluate(self, coefficients, displacement_x):
+        """Evaluate fitted coefficients at new displacements."""
+        if self.basis == "chebyshev":
+            return np.polynomial.chebyshev.chebval(
+                self.map_to_window(displacement_x), coefficients
+            )
+        return np.polyval(coefficients, displacement_x)
+
+
+def get_polynomial_fitter(displacement_x, degree, basis="monomial"):
+    """Return a PolynomialFitter for a grid, reusing a cached factorization.
+
+    Args:
+        displacement_x: array-like, shape (n, ), the displacement grid.
+        degree: the degree of the polynomial.
+        basis: "monomial" or "chebyshev".
+
+    Returns:
+        PolynomialFitter
+    """
+    displacement_x = np.ascontiguousarray(displacement_x, dtype=float)
+    key = (_hash_grid(displacement_x), displacement_x.shape, degree, basis)
+    fitter = _fitter_cache.get(key)
+    if fitter is None:
+        fitter = PolynomialFitter(displacement_x, degree, basis)
+        _fitter_cache.put(key, fitter)
+    return fitter
+
+
+def fit_polynomial_models(
+    displacement_x, parameter_sets, n_coefficients, basis="monomial"
+):
+    """Fit polynomial models to many piecewise spring models at once.
+
+    Args:
+        displacement_x: array-like, shape (n, ), the displacement grid.
+        parameter_sets: array-like, shape (k, 4), one row of (k1, k2, x1, x2)
+            per spring model.
+        n_coefficients: the polynomial degree, as in SpringForceModel.
+        basis: "monomial" or "chebyshev".
+
+    Returns:
+        The coefficients, shape (k, n_coefficients + 1), one row per model.
+    """
+    displacement_x = np.asarray(displacement_x, dtype=float)
+    parameter_sets = np.atleast_2d(parameter_sets)
+    spring_forces_f = np.empty(
+        (displacement_x.shape[0], parameter_sets.shape[0])
+    )
+    for i_model, (k1, k2, x1, x2) in enumerate(parameter_sets):
+        SpringForceModel(
+            k1, k2, x1, x2, n_coefficients
+        ).compute_spring_force_piecewise_fast(
+            displacement_x, out=spring_forces_f[:, i_model]
+        )
+    fitter = get_polynomial_fitter(displacement_x, n_coefficients, basis)
+    return fitter.fit(spring_forces_f).T
+
+
+class SurrogateCache:
+    """Stores fitted polynomial surrogates on disk, shared across processes.
+
+    Entries are content addressed: the file name is a hash of the model
+    parameters, the fitting options and the displacement grid. Files are
+    written atomically, and the least recently used entries are deleted
+    once the cache grows beyond max_bytes.
+    """
+
+    def __init__(self, cache_dir, max_bytes=64 * 2**20):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def make_key(self, fit_parameters, displacement_x):
+        """Build the content address of a fit.
+
+        Args:
+            fit_parameters: dict of JSON serializable model and fit options.
+            displacement_x: array-like, shape (n, ), the displacement grid.
+
+        Returns:
+            str
+        """
+        displacement_x = np.ascontiguousarray(displacement_x, dtype=float)
+        key_source = json.dumps(
+            {"version": _SURROGATE_CACHE_VERSION, **fit_parameters},
+            sort_keys=True,
+        )
+        key_source += _hash_grid(displacement_x)
+        return hashlib.sha256(key_source.encode()).hexdigest()
+
+    def _get_path(self, key):
+        return self.cache_dir / f"{key}.npz"
+
+    def load(self, key):
+        """Load a cached entry, or return None if it is not cached."""
+        path = self._get_path(key)
+        try:
+            with np.load(path) as entry:
+                arrays = {name: entry[name] for name in entry.files}
+            os.utime(path)
+        except (OSError, ValueError, zipfile.BadZipFile):
+            return None
+        return arrays
+
+    def store(self, key, **arrays):
+        """Store arrays under a key and evict old entries if needed."""
+        with tempfile.NamedTemporaryFile(
+            dir=self.cache_dir, suffix=".tmp", delete=False
+        ) as temporary_file:
+            np.savez(temporary_file, **arrays)
+        os.replace(temporary_file.name, self._get_path(key))
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        for path in self.cache_dir.glob("*.npz"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total_bytes -= size
+
+
+def set_default_surrogate_cache(surrogate_cache):
+    """Set the SurrogateCache used by models created without one.
+
+    Args:
+        surrogate_cache: a SurrogateCache, or None to disable caching.
+
+    Returns:
+        None
+    """
+    global _default_surrogate_cache
+    _default_surrogate_cache = surrogate_cache
 
 
 class SpringForceModel:
@@ -13,9 +232,24 @@ def __init__(
         recoverable_limit_x1,
         breakdown_limit_x2,
         n_coefficients,
+        basis="monomial",
+        use_fit_cache=False,
+        surrogate_cache=None,
     ):
-        """Initializes the spring force model"""
+        """Initializes the spring force model
+
+        The polynomial model is fit with np.polyfit by default. With
+        use_fit_cache, or with the "chebyshev" basis, fits reuse a cached QR
+        factorization of the displacement grid instead. Fits are looked up in
+        and saved to surrogate_cache, or the default SurrogateCache if one is
+        set, so repeated parameter sets skip fitting entirely.
+        """
         self.n_coefficients = n_coefficients
+        self.basis = basis
+        self.use_fit_cache = use_fit_cache
+        self.surrogate_cache = surrogate_cache
+        self.fit_residual_rms = None
+        self._chebyshev_domain = None
         self.spring_constant_normal_regime_k1 = (
             spring_constant_normal_regime_k1
         )
@@ -27,14 +261,60 @@ def __init__(
         self.coefficients = None
 
     def fit_polynomial_model(self, displacement_x):
-        self._spring_force_piecewise = self.compute_spring_force_piecewise(
-            displacement_x
+        surrogate_cache = self.surrogate_cache or _default_surrogate_cache
+        if surrogate_cache is None:
+            self._fit_polynomial_coefficients(displacement_x)
+            return
+        key = surrogate_cache.make_key(
+            self._get_fit_parameters(), displacement_x
+        )
+        entry = surrogate_cache.load(key)
+        if entry is not None:
+            self.coefficients = entry["coefficients"]
+            self._chebyshev_domain = tuple(entry["domain"])
+            self.fit_residual_rms = float(entry["residual_rms"])
+            return
+        self._fit_polynomial_coefficients(displacement_x)
+        fit_residual = (
+            self.compute_spring_force_polynomial(displacement_x)
+            - self._spring_force_piecewise
+        )
+        self.fit_residual_rms = np.sqrt(np.mean(fit_residual**2))
+        surrogate_cache.store(
+            key,
+            coefficients=self.coefficients,
+            domain=(np.min(displacement_x), np.max(displacement_x)),
+            residual_rms=self.fit_residual_rms,
+        )
+
+    def _get_fit_parameters(self):
+        uses_polyfit = self.basis == "monomial" and not self.use_fit_cache
+        return {
+            "k1": float(self.spring_constant_normal_regime_k1),
+            "k2": float(self.spring_constant_unrecoverable_regime_k2),
+            "x1": float(self.recoverable_limit_x1),
+            "x2": float(self.breakdown_limit_x2),
+            "n_coefficients": int(self.n_coefficients),
+            "basis": self.basis,
+            "fit_method": "polyfit" if uses_polyfit else "qr",
+        }
+
+    def _fit_polynomial_coefficients(self, displacement_x):
+        self._spring_force_piecewise = (
+            self.compute_spring_force_piecewise_fast(displacement_x)
         )
-        self.coefficients = np.polyfit(
-            displacement_x,
-            self._spring_force_piecewise,
-            deg=self.n_coefficients,
+        if self.basis == "monomial" and not self.use_fit_cache:
+            self.coefficients = np.polyfit(
+                displacement_x,
+                self._spring_force_piecewise,
+                deg=self.n_coefficients,
+            )
+            return
+        polynomial_fitter = get_polynomial_fitter(
+            displacement_x, self.n_coefficients, self.basis
         )
+        self._chebyshev_domain = polynomial_fitter.domain
+        self.coefficients = polynomial_fitter.fit(self._spring_force_piecewise)
 
     def compute_spring_force_linear(self, displacement_x):
         """Computes a simple linear model of a spring force."""
@@ -52,6 +332,49 @@ def compute_spring_force_piecewise(self, displacement_x):
         )
         return spring_force_f
 
+    def compute_spring_force_piecewise_fast(
+        self, displacement_x, out=None, dtype=None
+    ):
+        """Computes the piecewise spring force without storing any state.
+
+        Gives the same result as compute_spring_force_piecewise, but keeps no
+        masks on the model, so one instance can be shared between threads,
+        and reuses a single work array instead of many temporaries.
+
+        Args:
+            displacement_x: array-like, the spring displacements.
+            out: optional array to write the forces into.
+            dtype: optional floating point dtype, e.g. np.float32. Defaults to
+                the dtype of out, if given.
+
+        Returns:
+            The array of spring forces.
+        """
+        k1 = self.spring_constant_normal_regime_k1
+        k2 = self.spring_constant_unrecoverable_regime_k2
+        x1 = self.recoverable_limit_x1
+        x2 = self.breakdown_limit_x2
+        adjustment_offset = (k1 - k2) * x1
+        if dtype is None:
+            dtype = out.dtype if out is not None else np.float64
+        displacement_x = np.asarray(displacement_x)
+
+        work = np.abs(displacement_x, dtype=dtype)
+        linear_regime_mask = work < x1
+        breakdown_regime_mask = work >= x2
+        out = np.multiply(displacement_x, -k2, out=out, dtype=dtype)
+        # Shift by the offset times the sign of x, counting x = 0 as negative
+        # like compute_spring_force_piecewise.
+        np.greater(displacement_x, 0, out=work)
+        work *= 2
+        work -= 1
+        work *= adjustment_offset
+        out -= work
+        np.multiply(displacement_x, -k1, out=work)
+        np.copyto(out, work, where=linear_regime_mask)
+        np.copyto(out, 0, where=breakdown_regime_mask)
+        return out
+
     def _compute_boundary_adjusted_piecewise_force(self, displacement_x):
         spring_force_f = np.zeros(displacement_x.shape)
         spring_force_f[self._linear_regime_mask] = (
@@ -100,5 +423,223 @@ def _extract_piecewise_masks(self, displacement_x):
 
     def compute_spring_force_polynomial(self, displacement_x):
         """Computes polynomial model of a spring force."""
+        if self.basis == "chebyshev":
+            return np.polynomial.chebyshev.chebval(
+                _map_to_window(displacement_x, self._chebyshev_domain),
+                self.coefficients,
+            )
         spring_force_f = np.polyval(self.coefficients, displacement_x)
         return spring_force_f
+
+
+class MassSpringSimulator:
+    """Simulates many independent masses on springs at once.
+
+    Every oscillator shares the same spring model but can have its own mass
+    and initial conditions. The whole batch is advanced together with
+    velocity Verlet or fourth order Runge-Kutta integration.
+    """
+
+    def __init__(
+        self,
+        spring_model,
+        masses,
+        force_model="piecewise",
+        method="verlet",
+        n_boundary_substeps=1,
+    ):
+        """Initializes the simulator.
+
+        Args:
+            spring_model: the SpringForceModel giving force from displacement.
+            masses: array-like, shape (n, ), or a scalar, the masses.
+            force_model: "piecewise", "linear" or "polynomial". The polynomial
+                model must already be fit.
+            method: "verlet" for velocity Verlet or "rk4" for Runge-Kutta.
+            n_boundary_substeps: the number of smaller steps used for any
+                oscillator whose step would cross recoverable_limit_x1 or
+                breakdown_limit_x2. A value of 1 disables adaptive stepping.
+        """
+        force_functions = {
+            "piecewise": spring_model.compute_spring_force_piecewise_fast,
+            "linear": spring_model.compute_spring_force_linear,
+            "polynomial": spring_model.compute_spring_force_polynomial,
+        }
+        if force_model not in force_functions:
+            raise ValueError(f"Unknown force model: {force_model}")
+        if method not in ("verlet", "rk4"):
+            raise ValueError(f"Unknown integration method: {method}")
+        if force_model == "polynomial" and spring_model.coefficients is None:
+            raise ValueError("polynomial model must be fit before simulating")
+        self.spring_model = spring_model
+        self.masses = np.asarray(masses, dtype=float)
+        self.force_model = force_model
+        self.method = method
+        self.n_boundary_substeps = n_boundary_substeps
+        self._compute_force = force_functions[force_model]
+        self._regime_boundaries = np.array(
+            [
+                spring_model.recoverable_limit_x1,
+                spring_model.breakdown_limit_x2,
+            ]
+        )
+
+    def _compute_acceleration(self, displacement_x, masses):
+        return self._compute_force(displacement_x) / masses
+
+    def _step_verlet(
+        self, displacement_x, velocity_v, masses, time_step, acceleration=None
+    ):
+        # The acceleration at the end of a step is returned so the next step
+        # can start from it, which needs one force evaluation per step.
+        if acceleration is None:
+            acceleration = self._compute_acceleration(displacement_x, masses)
+        next_displacement_x = (
+            displacement_x
+            + velocity_v * time_step
+            + 0.5 * acceleration * time_step**2
+        )
+        next_acceleration = self._compute_acceleration(
+            next_displacement_x, masses
+        )
+        next_velocity_v = (
+            velocity_v + 0.5 * (acceleration + next_acceleration) * time_step
+        )
+        return next_displacement_x, next_velocity_v, next_acceleration
+
+    def _step_rk4(self, displacement_x, velocity_v, masses, time_step):
+        half_step = 0.5 * time_step
+        k1_x = velocity_v
+        k1_v = self._compute_acceleration(displacement_x, masses)
+        k2_x = velocity_v + half_step * k1_v
+        k2_v = self._compute_acceleration(
+            displacement_x + half_step * k1_x, masses
+        )
+        k3_x = velocity_v + half_step * k2_v
+        k3_v = self._compute_acceleration(
+            displacement_x + half_step * k2_x, masses
+        )
+        k4_x = velocity_v + time_step * k3_v
+        k4_v = self._compute_acceleration(
+            displacement_x + time_step * k3_x, masses
+        )
+        next_displacement_x = displacement_x + time_step / 6 * (
+            k1_x + 2 * k2_x + 2 * k3_x + k4_x
+        )
+        next_velocity_v = velocity_v + time_step / 6 * (
+            k1_v + 2 * k2_v + 2 * k3_v + k4_v
+        )
+        return next_displacement_x, next_velocity_v, None
+
+    def _step(
+        self, displacement_x, velocity_v, masses, time_step, acceleration=None
+    ):
+        if self.method == "rk4":
+            return self._step_rk4(
+                displacement_x, velocity_v, masses, time_step
+            )
+        return self._step_verlet(
+            displacement_x, velocity_v, masses, time_step, acceleration
+        )
+
+    def _find_boundary_crossings(self, displacement_x, velocity_v, time_step):
+        predicted_x = displacement_x + velocity_v * time_step
+        regime = np.searchsorted(
+            self._regime_boundaries, np.abs(displacement_x)
+        )
+        predicted_regime = np.searchsorted(
+            self._regime_boundaries, np.abs(predicted_x)
+        )
+        return regime != predicted_regime
+
+    def _advance(
+        self, displacement_x, velocity_v, masses, time_step, acceleration=None
+    ):
+        if self.n_boundary_substeps <= 1:
+            return self._step(
+                displacement_x, velocity_v, masses, time_step, acceleration
+            )
+        crossing = self._find_boundary_crossings(
+            displacement_x, velocity_v, time_step
+        )
+        if not np.any(crossing):
+            return self._step(
+                displacement_x, velocity_v, masses, time_step, acceleration
+            )
+        next_x = np.empty_like(displacement_x)
+        next_v = np.empty_like(velocity_v)
+        next_acceleration = None
+        if self.method == "verlet":
+            next_acceleration = np.empty_like(displacement_x)
+        for mask, n_substeps in [
+            (~crossing, 1),
+            (crossing, self.n_boundary_substeps),
+        ]:
+            sub_x = displacement_x[mask]
+            sub_v = velocity_v[mask]
+            sub_masses = masses[mask]
+            sub_acceleration = None
+            if acceleration is not None:
+                sub_acceleration = acceleration[mask]
+            substep = time_step / n_substeps
+            for _ in range(n_substeps):
+                sub_x, sub_v, sub_acceleration = self._step(
+                    sub_x, sub_v, sub_masses, substep, sub_acceleration
+                )
+            next_x[mask] = sub_x
+            next_v[mask] = sub_v
+            if next_acceleration is not None:
+                next_acceleration[mask] = sub_acceleration
+        return next_x, next_v, next_acceleration
+
+    def simulate(
+        self,
+        initial_displacement_x,
+        initial_velocity_v,
+        time_step,
+        n_steps,
+        out=None,
+        chunk_steps=1024,
+    ):
+        """Simulates the oscillators for a number of fixed output steps.
+
+        Args:
+            initial_displacement_x: array-like, shape (n, ), start positions.
+            initial_velocity_v: array-like, shape (n, ), start velocities.
+            time_step: the time between output samples in seconds.
+            n_steps: the number of steps to simulate.
+            out: optional array, shape (n_steps + 1, 2, n), e.g. from
+                np.lib.format.open_memmap, to write the trajectories into.
+            chunk_steps: the number of steps buffered in memory before being
+                written to out.
+
+        Returns:
+            The trajectories, shape (n_steps + 1, 2, n), holding the
+            displacement and velocity of every oscillator at every step.
+        """
+        displacement_x, velocity_v = np.broadcast_arrays(
+            np.asarray(initial_displacement_x, dtype=float),
+            np.asarray(initial_velocity_v, dtype=float),
+        )
+        displacement_x = displacement_x.copy()
+        velocity_v = velocity_v.copy()
+        masses = np.broadcast_to(self.masses, displacement_x.shape)
+        if out is None:
+            out = np.empty((n_steps + 1, 2, displacement_x.shape[0]))
+        buffer = np.empty((min(chunk_steps, n_steps + 1),) + out.shape[1:])
+        buffer[0] = displacement_x, velocity_v
+        n_buffered = 1
+        n_written = 0
+        acceleration = None
+        for _ in range(n_steps):
+            displacement_x, velocity_v, acceleration = self._advance(
+                displacement_x, velocity_v, masses, time_step, acceleration
+            )
+            if n_buffered == buffer.shape[0]:
+                out[n_written : n_written + n_buffered] = buffer
+                n_written += n_buffered
+                n_buffered = 0
+            buffer[n_buffered] = displacement_x, velocity_v
+            n_buffered += 1
+        out[n_written : n_written + n_buffered] = buffer[:n_buffered]
+        return out
@@ -0,0 +1,9 @@
+import os
+import sys
+
+NOTEBOOKS_DIRECTORY = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "notebooks"
+)
+
+# The notebook modules import each other as top level modules.
+sys.path.insert(0, NOTEBOOKS_DIRECTORY)
@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+NOTEBOOKS_DIRECTORY = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "notebooks"
+)
+
+# Modules that batch workers import without plotting. Importing them must not
+# load matplotlib.
+COMPUTE_CORE_MODULES = [
+    "caching",
+    "circuit_demos",
+    "circuit_models",
+    "joint_distribution_plotter",
+    "joint_distribution_statistics",
+    "label_rendering",
+    "linear_algebra_demos",
+    "linear_algebra_models",
+    "signal_tools",
+    "spring_demos",
+]
+
+
+@pytest.mark.parametrize("module", COMPUTE_CORE_MODULES)
+def test_import_does_not_load_matplotlib(module):
+    # Import in a fresh interpreter, since this one may already have loaded
+    # matplotlib.
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"import sys, {module}\nsys.exit('matplotlib' in sys.modules)",
+        ],
+        cwd=NOTEBOOKS_DIRECTORY,
+    )
+    assert completed.returncode == 0
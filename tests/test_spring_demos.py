@@ -0,0 +1,20 @@
+import numpy as np
+import pytest
+from spring_demos import SpringForceModel
+
+
+# Cover both a softening (k1 > k2) and a stiffening (k2 > k1) spring.
+@pytest.mark.parametrize("k1, k2", [(2.0, 0.5), (0.5, 2.0)])
+@pytest.mark.parametrize(
+    "dtype, tolerance", [(np.float64, 1e-12), (np.float32, 1e-5)]
+)
+def test_spring_force_piecewise_fast_matches_piecewise(
+    k1, k2, dtype, tolerance
+):
+    displacement_x = np.linspace(-4, 4, 10_001)
+    spring_model = SpringForceModel(k1, k2, 1.0, 3.0, 5)
+    expected = spring_model.compute_spring_force_piecewise(displacement_x)
+    actual = spring_model.compute_spring_force_piecewise_fast(
+        displacement_x, dtype=dtype
+    )
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=tolerance)